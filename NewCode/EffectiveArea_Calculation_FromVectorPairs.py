@@ -1,4 +1,5 @@
 import math
+import numpy as np
 import pandas as pd
 from shapely.geometry import Polygon
 from shapely.ops import unary_union
@@ -16,6 +17,9 @@ class ShadowCalculator:
         self.H = H if H is not None else self.CONFIG['H']
         self.A_SA = self.D * self.H  # Solar array initial area
         self.A_chassis = self.L * self.D  # Chassis initial area
+        
+        # Solar array rectangle (0,0) to (D, H), built once and reused by the shadow calculations
+        self._solar_rect = Polygon([(0, 0), (self.D, 0), (self.D, self.H), (0, self.H)])
     
     def cartesian_to_spherical(self, x, y, z):
         """Convert Cartesian coordinates (x,y,z) to spherical coordinates (phi, theta) in degrees"""
@@ -54,15 +58,8 @@ class ShadowCalculator:
     
     def get_quadrant(self, phi_deg):
         """Determine which quadrant phi is in (1-4)"""
-        phi = phi_deg % 360
-        if 0 <= phi < 90:
-            return 1
-        elif 90 <= phi < 180:
-            return 2
-        elif 180 <= phi < 270:
-            return 3
-        else:
-            return 4
+        # Floor division keeps negative angles in the right quadrant; & 3 wraps it to 0-3
+        return 1 + (int(phi_deg // 90) & 3)
     
     def calculate_shadow(self, phi_deg, theta_deg):
         """Calculate shadow vertices as the intersection of the parallelogram and the solar array rectangle"""
@@ -93,11 +90,8 @@ class ShadowCalculator:
                 (-x_offset, y_offset)
             ])
         
-        # Solar array rectangle (0,0) to (D, H)
-        solar_array_rect = Polygon([(0, 0), (self.D, 0), (self.D, self.H), (0, self.H)])
-        
-        # Compute intersection (actual shadow shape)
-        shadow_intersection = shadow_poly.intersection(solar_array_rect)
+        # Compute intersection with the solar array rectangle (actual shadow shape)
+        shadow_intersection = shadow_poly.intersection(self._solar_rect)
         
         # Extract vertices
         if shadow_intersection.is_empty:
@@ -115,10 +109,9 @@ class ShadowCalculator:
         v_i, _ = self.calculate_shadow(phi_i, theta_i)
         v_o, _ = self.calculate_shadow(phi_o, theta_o)
         
-        rect = Polygon([(0, 0), (self.D, 0), (self.D, self.H), (0, self.H)])
         combined = unary_union([Polygon(v_i), Polygon(v_o)])
         
-        non_shadow = rect.difference(combined)
+        non_shadow = self._solar_rect.difference(combined)
         non_shadow_area = non_shadow.area if hasattr(non_shadow, 'area') else self.D * self.H
         return non_shadow_area, combined
     
@@ -216,37 +209,44 @@ def calculate_solar_phase_angle(xi, yi, zi, xo, yo, zo):
 
 
 def process_vectors(input_path, output_path):
-    df = pd.read_csv(input_path)
+    df = pd.read_parquet(input_path)
     print("Columns found:", df.columns.tolist())
     
-    results = []
     calculator = ShadowCalculator()
+    xi_all, yi_all, zi_all, xo_all, yo_all, zo_all = (
+        df[c].to_numpy(dtype=float) for c in ['i_x', 'i_y', 'i_z', 'o_x', 'o_y', 'o_z'])
     
-    for _, row in df.iterrows():
+    # Preallocated output columns; rows that fail stay NaN and are dropped below
+    N = len(df)
+    phase_angle = np.full(N, np.nan)
+    A_eff_SA = np.full(N, np.nan)
+    A_eff_chassis = np.full(N, np.nan)
+    
+    for i in range(N):
         try:
-            xi, yi, zi = row['i_x'], row['i_y'], row['i_z']
-            xo, yo, zo = row['o_x'], row['o_y'], row['o_z']
-            
-            phase_angle = calculate_solar_phase_angle(xi, yi, zi, xo, yo, zo)
-            A_eff_SA, A_eff_chassis = calculator.calculate_effective_area(xi, yi, zi, xo, yo, zo)
+            xi, yi, zi = xi_all[i], yi_all[i], zi_all[i]
+            xo, yo, zo = xo_all[i], yo_all[i], zo_all[i]
             
-            results.append({
-                'i_x': xi, 'i_y': yi, 'i_z': zi,
-                'o_x': xo, 'o_y': yo, 'o_z': zo,
-                'phase_angle': phase_angle,
-                'A_eff_SA': A_eff_SA,
-                'A_eff_chassis': A_eff_chassis
-            })
+            phase_angle_i = calculate_solar_phase_angle(xi, yi, zi, xo, yo, zo)
+            A_eff_SA[i], A_eff_chassis[i] = calculator.calculate_effective_area(xi, yi, zi, xo, yo, zo)
+            phase_angle[i] = phase_angle_i
         except Exception as e:
             print(f"Error processing row: {str(e)}")
             continue
     
-    pd.DataFrame(results).to_csv(output_path, index=False)
+    keep = ~np.isnan(phase_angle)
+    pd.DataFrame({
+        'i_x': xi_all, 'i_y': yi_all, 'i_z': zi_all,
+        'o_x': xo_all, 'o_y': yo_all, 'o_z': zo_all,
+        'phase_angle': phase_angle,
+        'A_eff_SA': A_eff_SA,
+        'A_eff_chassis': A_eff_chassis
+    })[keep].to_csv(output_path, index=False)
     print(f"Results saved to {output_path}")
 
 
 # Example usage
 if __name__ == "__main__":
-    input_path = r'C:...\NewCode\viewing_sphere_pairs.csv'
+    input_path = r'C:...\NewCode\viewing_sphere_pairs.parquet'
     output_path = r'...\NewCode\results.csv'
     process_vectors(input_path, output_path)
\ No newline at end of file
@@ -1,9 +1,204 @@
 import math
-from shapely.geometry import Polygon
-from shapely.ops import unary_union
+import os
+import sys
+from contextlib import contextmanager
+from functools import lru_cache
+import numpy as np
+from numba import njit, prange
+import matplotlib
+matplotlib.use('Agg')  # Headless backend: figures are written to disk, never shown
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d.art3d import Poly3DCollection
 
+
+@lru_cache(maxsize=4096)
+def _shadow_offsets(phi_deg, theta_deg):
+    """Shadow offsets per unit chassis length, (cot(phi) sin(theta), cot(phi) cos(theta)); cached per angle pair"""
+    phi = math.radians(phi_deg)
+    theta = math.radians(theta_deg)
+    
+    # Grazing light (tan(phi) ~ 0) gives a zero-height parallelogram, i.e. no shadow
+    tan_phi = math.tan(phi)
+    cot_phi = 1 / tan_phi if abs(tan_phi) > 1e-12 else 0.0
+    return cot_phi * math.sin(theta), cot_phi * math.cos(theta)
+
+
+def _clip_to_rect(vertices, D, H):
+    """Clip a polygon to the rectangle [0, D] x [0, H] (Sutherland-Hodgman) and return (vertices, area)"""
+    # Each boundary is (coordinate index, clip value, whether the inside is below the value)
+    for axis, bound, keep_below in ((0, 0, False), (0, D, True), (1, 0, False), (1, H, True)):
+        clipped = []
+        if vertices:
+            prev = vertices[-1]
+            prev_inside = prev[axis] <= bound if keep_below else prev[axis] >= bound
+            for cur in vertices:
+                cur_inside = cur[axis] <= bound if keep_below else cur[axis] >= bound
+                if cur_inside != prev_inside:
+                    # Edge crosses the boundary: emit the intersection point
+                    t = (bound - prev[axis]) / (cur[axis] - prev[axis])
+                    clipped.append((prev[0] + t * (cur[0] - prev[0]), prev[1] + t * (cur[1] - prev[1])))
+                if cur_inside:
+                    clipped.append(cur)
+                prev, prev_inside = cur, cur_inside
+        vertices = clipped
+    
+    # Shoelace formula for the area of the clipped polygon
+    area = 0
+    for (x0, y0), (x1, y1) in zip(vertices, vertices[1:] + vertices[:1]):
+        area += x0 * y1 - x1 * y0
+    area = abs(area) / 2
+    
+    if len(vertices) < 3 or area == 0:
+        return [], 0
+    return vertices, area
+
+
+@njit(cache=True)
+def _shadow_quad(L, D, phi_deg, theta_deg):
+    """Unbounded shadow parallelogram as a (4, 2) array (empty if there is no shadow)"""
+    quad = np.empty((4, 2))
+    
+    # Handle vertical case (phi = 90°)
+    if abs(phi_deg % 180 - 90) <= 1e-7:
+        # Vertical light source creates a rectangular shadow
+        x_offset, y_offset = 0.0, L
+    else:
+        # Same formula as _shadow_offsets
+        tan_phi = math.tan(math.radians(phi_deg))
+        cot_phi = 1 / tan_phi if abs(tan_phi) > 1e-12 else 0.0
+        x_offset = L * (cot_phi * math.sin(math.radians(theta_deg)))
+        y_offset = L * (cot_phi * math.cos(math.radians(theta_deg)))
+    
+    quad[0, 0], quad[0, 1] = 0.0, 0.0
+    quad[1, 0], quad[1, 1] = D, 0.0
+    quad[2, 0], quad[2, 1] = D - x_offset, y_offset
+    quad[3, 0], quad[3, 1] = -x_offset, y_offset
+    return quad
+
+
+@njit(cache=True)
+def _clip_quad_to_rect(quad, D, H):
+    """Compiled _clip_to_rect for a (4, 2) polygon, returning ((n, 2) vertices, area)"""
+    # Clipping a quadrilateral by four half-planes gives at most 8 vertices
+    src = np.empty((8, 2))
+    dst = np.empty((8, 2))
+    src[:quad.shape[0]] = quad
+    n = quad.shape[0]
+    
+    for edge in range(4):
+        axis = edge // 2
+        keep_below = edge % 2 == 1
+        bound = 0.0 if not keep_below else (D if axis == 0 else H)
+        
+        m = 0
+        if n > 0:
+            prev_x, prev_y = src[n - 1, 0], src[n - 1, 1]
+            prev_inside = src[n - 1, axis] <= bound if keep_below else src[n - 1, axis] >= bound
+            for k in range(n):
+                cur_x, cur_y = src[k, 0], src[k, 1]
+                cur_inside = src[k, axis] <= bound if keep_below else src[k, axis] >= bound
+                if cur_inside != prev_inside:
+                    prev_c = prev_x if axis == 0 else prev_y
+                    cur_c = cur_x if axis == 0 else cur_y
+                    t = (bound - prev_c) / (cur_c - prev_c)
+                    dst[m, 0] = prev_x + t * (cur_x - prev_x)
+                    dst[m, 1] = prev_y + t * (cur_y - prev_y)
+                    m += 1
+                if cur_inside:
+                    dst[m, 0], dst[m, 1] = cur_x, cur_y
+                    m += 1
+                prev_x, prev_y, prev_inside = cur_x, cur_y, cur_inside
+        src, dst = dst, src
+        n = m
+    
+    # Shoelace formula
+    area = 0.0
+    for k in range(n):
+        j = (k + 1) % n
+        area += src[k, 0] * src[j, 1] - src[j, 0] * src[k, 1]
+    area = abs(area) / 2
+    
+    if n < 3 or area == 0:
+        return src[:0].copy(), 0.0
+    return src[:n].copy(), area
+
+
+@njit(cache=True)
+def _clip_convex(subject, clip):
+    """Intersection of a polygon with a convex polygon (Sutherland-Hodgman), returning ((n, 2) vertices, area)"""
+    n, n_clip = subject.shape[0], clip.shape[0]
+    if n < 3 or n_clip < 3:
+        return subject[:0].copy(), 0.0
+    
+    # Orientation of the clip polygon decides which side of each edge is inside
+    orientation = 0.0
+    for k in range(n_clip):
+        j = (k + 1) % n_clip
+        orientation += clip[k, 0] * clip[j, 1] - clip[j, 0] * clip[k, 1]
+    sign = 1.0 if orientation > 0 else -1.0
+    
+    src = np.empty((n + n_clip, 2))
+    dst = np.empty((n + n_clip, 2))
+    src[:n] = subject
+    
+    for e in range(n_clip):
+        ax, ay = clip[e, 0], clip[e, 1]
+        ex, ey = clip[(e + 1) % n_clip, 0] - ax, clip[(e + 1) % n_clip, 1] - ay
+        
+        m = 0
+        if n > 0:
+            prev_x, prev_y = src[n - 1, 0], src[n - 1, 1]
+            prev_side = sign * (ex * (prev_y - ay) - ey * (prev_x - ax))
+            for k in range(n):
+                cur_x, cur_y = src[k, 0], src[k, 1]
+                cur_side = sign * (ex * (cur_y - ay) - ey * (cur_x - ax))
+                if (cur_side >= 0) != (prev_side >= 0):
+                    t = prev_side / (prev_side - cur_side)
+                    dst[m, 0] = prev_x + t * (cur_x - prev_x)
+                    dst[m, 1] = prev_y + t * (cur_y - prev_y)
+                    m += 1
+                if cur_side >= 0:
+                    dst[m, 0], dst[m, 1] = cur_x, cur_y
+                    m += 1
+                prev_x, prev_y, prev_side = cur_x, cur_y, cur_side
+        src, dst = dst, src
+        n = m
+    
+    # Shoelace formula
+    area = 0.0
+    for k in range(n):
+        j = (k + 1) % n
+        area += src[k, 0] * src[j, 1] - src[j, 0] * src[k, 1]
+    area = abs(area) / 2
+    
+    if n < 3 or area == 0:
+        return src[:0].copy(), 0.0
+    return src[:n].copy(), area
+
+
+@njit(parallel=True, cache=True)
+def _non_shadow_areas(L, D, H, phi_i, theta_i, phi_o, theta_o):
+    """Compiled calculate_combined_non_shadow area for arrays of (already adjusted) angle pairs"""
+    areas = np.empty(phi_i.shape[0])
+    for k in prange(phi_i.shape[0]):
+        v_i, area_i = _clip_quad_to_rect(_shadow_quad(L, D, phi_i[k], theta_i[k]), D, H)
+        v_o, area_o = _clip_quad_to_rect(_shadow_quad(L, D, phi_o[k], theta_o[k]), D, H)
+        _, area_both = _clip_convex(v_i, v_o)
+        
+        # Inclusion-exclusion: the non-shadow area is the rectangle minus the union of both shadows
+        areas[k] = D * H - (area_i + area_o - area_both)
+    return areas
+
+
+@contextmanager
+def _figure(**kwargs):
+    """Create a figure that is always closed, even if plotting fails"""
+    fig = plt.figure(**kwargs)
+    try:
+        yield fig
+    finally:
+        plt.close(fig)
+
 class ShadowCalculator:
     """A unified calculator for shadow properties and non-shadow areas"""
     
@@ -16,71 +211,64 @@ class ShadowCalculator:
         self.H = H if H is not None else self.CONFIG['H']
         self.A_SA = self.D * self.H  # Solar array initial area
         self.A_chassis = self.L * self.D  # Chassis initial area
+        
+        # Case table indexed by [quad_i, quad_o] -> (A_eff_SA, A_eff_chassis); unlisted cases are 0
+        self._CASE_TABLE = np.zeros((5, 5, 2))
+        self._CASE_TABLE[2, 3] = (self.A_SA, 0)             # Case2-3
+        self._CASE_TABLE[3, 3] = (self.A_SA, self.A_chassis)  # Case3-3
+        self._CASE_TABLE[3, 4] = (0, self.A_chassis)         # Case3-4
+        self._CASE_TABLE[4, 3] = (0, self.A_chassis)         # Case4-3
+        self._CASE_TABLE[4, 4] = (0, self.A_chassis)         # Case4-4 (SA from special case)
+        
+        # Cases whose solar array area needs the shadow calculation (1-4 and 4-4)
+        self._SPECIAL = np.zeros((5, 5), dtype=bool)
+        self._SPECIAL[1, 4] = True
+        self._SPECIAL[4, 4] = True
     
     def get_quadrant(self, phi_deg):
         """Determine which quadrant phi is in (1-4)"""
-        phi = phi_deg % 360
-        if 0 <= phi < 90:
-            return 1
-        elif 90 <= phi < 180:
-            return 2
-        elif 180 <= phi < 270:
-            return 3
-        else:
-            return 4
+        # Floor division keeps negative angles in the right quadrant; & 3 wraps it to 0-3
+        return 1 + (int(phi_deg // 90) & 3)
+    
+    def get_quadrants(self, phi_deg):
+        """Vectorized get_quadrant for an array of angles"""
+        return 1 + (np.floor_divide(phi_deg, 90).astype(np.int64) & 3)
     
     def calculate_shadow(self, phi_deg, theta_deg):
         """Calculate shadow vertices as the intersection of the parallelogram and the solar array rectangle"""
-        # Angle conversion
-        phi = math.radians(phi_deg)
-        theta = math.radians(theta_deg)
-        
-        # Handle vertical case (phi = 90°)
-        if math.isclose(phi_deg % 180, 90, abs_tol=1e-9):
+        # Handle vertical case (phi = 90°); a plain comparison is cheaper than math.isclose
+        if abs(phi_deg % 180 - 90) <= 1e-7:
             # Vertical light source creates a rectangular shadow
-            shadow_poly = Polygon([(0, 0), (self.D, 0), (self.D, self.L), (0, self.L)])
+            shadow_vertices = [(0, 0), (self.D, 0), (self.D, self.L), (0, self.L)]
         else:
-            # Trigonometric calculations
-            cot_phi = 1 / math.tan(phi) if math.tan(phi) != 0 else float('inf')
-            x_offset = self.L * cot_phi * math.sin(theta)
-            y_offset = self.L * cot_phi * math.cos(theta)
+            # Trigonometric calculations (cached for repeated angles)
+            x_unit, y_unit = _shadow_offsets(phi_deg, theta_deg)
+            x_offset = self.L * x_unit
+            y_offset = self.L * y_unit
             
             # Parallelogram vertices (unbounded shadow)
-            shadow_poly = Polygon([
+            shadow_vertices = [
                 (0, 0),
                 (self.D, 0),
                 (self.D - x_offset, y_offset),
                 (-x_offset, y_offset)
-            ])
-        
-        # Solar array rectangle (0,0) to (D, H)
-        solar_array_rect = Polygon([(0, 0), (self.D, 0), (self.D, self.H), (0, self.H)])
+            ]
         
-        # Compute intersection (actual shadow shape)
-        shadow_intersection = shadow_poly.intersection(solar_array_rect)
-        
-        # Extract vertices
-        if shadow_intersection.is_empty:
-            vertices = []
-            area = 0
-        else:
-            # Get exterior coordinates (ignoring possible holes)
-            vertices = list(shadow_intersection.exterior.coords)
-            area = shadow_intersection.area
-        
-        return vertices, area
+        # Clip against the solar array rectangle (0,0) to (D, H) to get the actual shadow shape
+        return _clip_to_rect(shadow_vertices, self.D, self.H)
     
     def calculate_combined_non_shadow(self, phi_i, theta_i, phi_o, theta_o):
-        """Calculate combined non-shadow area and shadow geometry for two light sources"""
-        v_i, _ = self.calculate_shadow(phi_i, theta_i)
-        v_o, _ = self.calculate_shadow(phi_o, theta_o)
+        """Calculate combined non-shadow area and the two shadow polygons for two light sources"""
+        v_i, area_i = self.calculate_shadow(phi_i, theta_i)
+        v_o, area_o = self.calculate_shadow(phi_o, theta_o)
         
-        rect = Polygon([(0, 0), (self.D, 0), (self.D, self.H), (0, self.H)])
-        combined = unary_union([Polygon(v_i), Polygon(v_o)])
+        # Both clipped shadows are convex, so their overlap is one more convex clip
+        _, area_both = _clip_convex(np.array(v_i, dtype=float).reshape(-1, 2),
+                                    np.array(v_o, dtype=float).reshape(-1, 2))
         
-        non_shadow = rect.difference(combined)
-        non_shadow_area = non_shadow.area if hasattr(non_shadow, 'area') else self.D * self.H
-        return non_shadow_area, combined
+        # Inclusion-exclusion: the rectangle minus the union of both shadows
+        non_shadow_area = self.D * self.H - (area_i + area_o - area_both)
+        return non_shadow_area, [v_i, v_o]
     
     def calculate_special_case(self, phi_i, theta_i, phi_o, theta_o):
         """Handle special case where φ_i is in Q1/Q4 and φ_o is in Q4"""
@@ -103,53 +291,41 @@ class ShadowCalculator:
         quad_i = self.get_quadrant(phi_i)
         quad_o = self.get_quadrant(phi_o)
         
-        # Initialize both areas
-        A_eff_SA = 0
-        A_eff_chassis = 0
-        
-        # Case determination
-        if quad_i == 1:
-            if quad_o == 3:
-                # Case 1-3: φ_i in Q1, φ_o in Q3
-                A_eff_SA = 0
-                A_eff_chassis = 0
-            elif quad_o == 4:
-                # Case1-4: Special case
-                A_eff_SA = self.calculate_special_case(phi_i, theta_i, phi_o, theta_o)
-                A_eff_chassis = 0
-                
-        elif quad_i == 2:
-            if quad_o == 3:
-                # Case2-3: φ_i in Q2, φ_o in Q3
-                A_eff_SA = self.A_SA
-                A_eff_chassis = 0
-            elif quad_o == 4:
-                # Case2-4: φ_i in Q2, φ_o in Q4
-                A_eff_SA = 0
-                A_eff_chassis = 0
-        
-        elif quad_i == 3:
-            if quad_o == 3:
-                # Case3-3: φ_i in Q3, φ_o in Q3
-                A_eff_SA = self.A_SA
-                A_eff_chassis = self.A_chassis
-            elif quad_o == 4:
-                # Case3-4: φ_i in Q3, φ_o in Q4
-                A_eff_SA = 0
-                A_eff_chassis = self.A_chassis
-        
-        elif quad_i == 4:
-            if quad_o == 3:
-                # Case4-3: φ_i in Q4, φ_o in Q3
-                A_eff_SA = 0
-                A_eff_chassis = self.A_chassis
-            elif quad_o == 4:
-                # Case4-4: Special case
-                A_eff_SA = self.calculate_special_case(phi_i, theta_i, phi_o, theta_o)
-                A_eff_chassis = self.A_chassis
+        # Constant cases come straight from the table; 1-4 and 4-4 need the shadow calculation
+        A_eff_SA, A_eff_chassis = self._CASE_TABLE[quad_i, quad_o]
+        if self._SPECIAL[quad_i, quad_o]:
+            A_eff_SA = self.calculate_special_case(phi_i, theta_i, phi_o, theta_o)
                 
         return A_eff_SA, A_eff_chassis
 
+    def calculate_effective_area_batch(self, phi_i, theta_i, phi_o, theta_o):
+        """Calculate effective areas for arrays of angles, returning (A_eff_SA, A_eff_chassis) arrays"""
+        phi_i, theta_i = np.asarray(phi_i, dtype=float), np.asarray(theta_i, dtype=float)
+        phi_o, theta_o = np.asarray(phi_o, dtype=float), np.asarray(theta_o, dtype=float)
+        
+        quad_i = self.get_quadrants(phi_i)
+        quad_o = self.get_quadrants(phi_o)
+        
+        # Constant cases straight from the table
+        A_eff_SA = self._CASE_TABLE[quad_i, quad_o, 0]
+        A_eff_chassis = self._CASE_TABLE[quad_i, quad_o, 1]
+        
+        # Shadow calculation only for the special-case subset, with Q4 angles adjusted as in
+        # calculate_special_case
+        special = np.flatnonzero(self._SPECIAL[quad_i, quad_o])
+        phi_i_adj = np.where(quad_i[special] == 1, 0.0, phi_i[special] - 270)
+        phi_o_adj = phi_o[special] - 270
+        
+        # Sampled geometries repeat a lot, so evaluate each distinct angle set only once
+        angles, inverse = np.unique(
+            np.column_stack([phi_i_adj, theta_i[special], phi_o_adj, theta_o[special]]),
+            axis=0, return_inverse=True
+        )
+        areas = _non_shadow_areas(self.L, self.D, self.H, *np.ascontiguousarray(angles.T))
+        A_eff_SA[special] = areas[inverse.ravel()]
+        
+        return A_eff_SA, A_eff_chassis
+
     def create_solar_array(self):
         """Create solar array geometry"""
         return [
@@ -164,150 +340,139 @@ class ShadowCalculator:
             (self.L, self.D, 0), (0, self.D, 0)
         ]
     
-    def plot_scene_with_shadows(self, phi_i, theta_i, phi_o, theta_o):
-        """Create 3D visualization with shadows based on input angles"""
-        fig = plt.figure(figsize=(6, 7))
-        ax = fig.add_subplot(111, projection='3d')
-        
-        # Calculate effective area
-        A_eff_SA, A_eff_chassis = self.calculate_effective_area(phi_i, theta_i, phi_o, theta_o)
-        
-        # Create solar array and chassis
-        solar_array = self.create_solar_array()
-        chassis = self.create_chassis()
-        
-        # Determine colors based on effective area
-        sa_color = 'blue' if A_eff_SA > 0 else 'gray'
-        chassis_color = 'green' if A_eff_chassis > 0 else 'gray'
-        
-        # Plot solar array
-        sa_poly = Poly3DCollection([solar_array], alpha=0.5, facecolors=sa_color, 
-                                linewidths=1, edgecolors='navy')
-        ax.add_collection3d(sa_poly)
-        
-        # Plot chassis
-        ch_poly = Poly3DCollection([chassis], alpha=0.5, facecolors=chassis_color, 
-                                linewidths=1, edgecolors='darkgreen')
-        ax.add_collection3d(ch_poly)
-        
-        # Calculate arrow directions for light sources
-        def calculate_direction(phi, theta):
-            phi_rad = math.radians(phi)
-            theta_rad = math.radians(theta)
+    def plot_scene_with_shadows(self, phi_i, theta_i, phi_o, theta_o, save_path):
+        """Create 3D visualization with shadows based on input angles and save it to save_path"""
+        with _figure(figsize=(6, 7)) as fig:
+            ax = fig.add_subplot(111, projection='3d')
+        
+            # Calculate effective area
+            A_eff_SA, A_eff_chassis = self.calculate_effective_area(phi_i, theta_i, phi_o, theta_o)
+        
+            # Create solar array and chassis
+            solar_array = self.create_solar_array()
+            chassis = self.create_chassis()
+        
+            # Determine colors based on effective area
+            sa_color = 'blue' if A_eff_SA > 0 else 'gray'
+            chassis_color = 'green' if A_eff_chassis > 0 else 'gray'
+        
+            # Plot solar array
+            sa_poly = Poly3DCollection([solar_array], alpha=0.5, facecolors=sa_color, 
+                                    linewidths=1, edgecolors='navy')
+            ax.add_collection3d(sa_poly)
+        
+            # Plot chassis
+            ch_poly = Poly3DCollection([chassis], alpha=0.5, facecolors=chassis_color, 
+                                    linewidths=1, edgecolors='darkgreen')
+            ax.add_collection3d(ch_poly)
+        
+            # Calculate arrow directions for light sources
+            def calculate_direction(phi, theta):
+                phi_rad = math.radians(phi)
+                theta_rad = math.radians(theta)
             
-            # Convert spherical coordinates to Cartesian
-            x = math.cos(phi_rad) * math.cos(theta_rad)
-            y = math.cos(phi_rad) * math.sin(theta_rad)
-            z = math.sin(phi_rad)
+                # Convert spherical coordinates to Cartesian
+                x = math.cos(phi_rad) * math.cos(theta_rad)
+                y = math.cos(phi_rad) * math.sin(theta_rad)
+                z = math.sin(phi_rad)
             
-            # Normalize to a reasonable length
-            max_dim = max(self.L, self.D, self.H)
-            length = max_dim * 0.5
-            return (x * length, y * length, z * length)
-        
-        # Calculate arrow start points (centered in the scene)
-        center_x_i = self.L * math.cos(math.radians(phi_i))
-        center_y_i = self.D / 2
-        center_z_i = self.L * math.sin(math.radians(phi_i))
-        
-        center_x_o = self.L * math.cos(math.radians(phi_o))
-        center_y_o = self.D / 2
-        center_z_o = self.L * math.sin(math.radians(phi_o))
-        
-        # Calculate arrow directions
-        dir_i = calculate_direction(phi_i, theta_i)
-        dir_o = calculate_direction(phi_o, theta_o)
-        
-        # Plot arrows for light sources
-        ax.quiver(center_x_i, center_y_i, center_z_i, 
-                dir_i[0], dir_i[1], dir_i[2], 
-                color='red', arrow_length_ratio=0.1, label='Incident Light')
+                # Normalize to a reasonable length
+                max_dim = max(self.L, self.D, self.H)
+                length = max_dim * 0.5
+                return (x * length, y * length, z * length)
+        
+            # Calculate arrow start points (centered in the scene)
+            center_x_i = self.L * math.cos(math.radians(phi_i))
+            center_y_i = self.D / 2
+            center_z_i = self.L * math.sin(math.radians(phi_i))
+        
+            center_x_o = self.L * math.cos(math.radians(phi_o))
+            center_y_o = self.D / 2
+            center_z_o = self.L * math.sin(math.radians(phi_o))
+        
+            # Calculate arrow directions
+            dir_i = calculate_direction(phi_i, theta_i)
+            dir_o = calculate_direction(phi_o, theta_o)
+        
+            # Plot arrows for light sources
+            ax.quiver(center_x_i, center_y_i, center_z_i, 
+                    dir_i[0], dir_i[1], dir_i[2], 
+                    color='red', arrow_length_ratio=0.1, label='Incident Light')
 
-        ax.quiver(center_x_o, center_y_o, center_z_o, 
-                dir_o[0], dir_o[1], dir_o[2], 
-                color='orange', arrow_length_ratio=0.1, label='Observer')
+            ax.quiver(center_x_o, center_y_o, center_z_o, 
+                    dir_o[0], dir_o[1], dir_o[2], 
+                    color='orange', arrow_length_ratio=0.1, label='Observer')
 
-        # Handle special cases (1-4 and 4-4)
-        quad_i = self.get_quadrant(phi_i)
-        quad_o = self.get_quadrant(phi_o)
-        case_name = f"Case {quad_i}-{quad_o}"
-        
-        if (quad_i == 1 and quad_o == 4) or (quad_i == 4 and quad_o == 4):
-            # Adjust angles according to the original special case logic
-            if quad_i == 1 and quad_o == 4:
-                # Case1-4: φ_i becomes 0, φ_o becomes φ_o-270
-                phi_i_adj = 0
-                phi_o_adj = phi_o - 270
-            else:  # quad_i == 4 and quad_o == 4
-                # Case4-4: both angles adjusted by -270
-                phi_i_adj = phi_i - 270
-                phi_o_adj = phi_o - 270
-            
-            # Get the combined shadow geometry
-            _, combined_shadow = self.calculate_combined_non_shadow(
-                phi_i_adj, theta_i,
-                phi_o_adj, theta_o
-            )
+            # Handle special cases (1-4 and 4-4)
+            quad_i = self.get_quadrant(phi_i)
+            quad_o = self.get_quadrant(phi_o)
+            case_name = f"Case {quad_i}-{quad_o}"
+        
+            if (quad_i == 1 and quad_o == 4) or (quad_i == 4 and quad_o == 4):
+                # Adjust angles according to the original special case logic
+                if quad_i == 1 and quad_o == 4:
+                    # Case1-4: φ_i becomes 0, φ_o becomes φ_o-270
+                    phi_i_adj = 0
+                    phi_o_adj = phi_o - 270
+                else:  # quad_i == 4 and quad_o == 4
+                    # Case4-4: both angles adjusted by -270
+                    phi_i_adj = phi_i - 270
+                    phi_o_adj = phi_o - 270
             
-            # Convert to 3D coordinates (x=0 since it's on the YZ plane)
-            def to_3d(polygon):
-                if hasattr(polygon, 'geoms'):  # MultiPolygon case
-                    return [[(0, x, y) for x, y in poly.exterior.coords] for poly in polygon.geoms]
-                else:  # Single Polygon case
-                    return [[(0, x, y) for x, y in polygon.exterior.coords]]
+                # Get the shadow polygons of both light sources
+                _, shadows = self.calculate_combined_non_shadow(
+                    phi_i_adj, theta_i,
+                    phi_o_adj, theta_o
+                )
             
-            if not combined_shadow.is_empty:
-                shadow_3d = to_3d(combined_shadow)
-                if isinstance(shadow_3d[0][0], tuple):  # Single polygon
-                    shadow_poly = Poly3DCollection(shadow_3d, alpha=1,
-                                                facecolors='black', linewidths=1,
-                                                edgecolors='black')
-                    ax.add_collection3d(shadow_poly)
-                else:  # Multiple polygons
-                    for poly in shadow_3d:
-                        shadow_poly = Poly3DCollection([poly], alpha=1,
+                # Draw each shadow in 3D (x=0 since it's on the YZ plane); overlapping
+                # opaque shadows render the same as their union
+                for shadow in shadows:
+                    if shadow:
+                        shadow_poly = Poly3DCollection([[(0, x, y) for x, y in shadow]], alpha=1,
                                                     facecolors='black', linewidths=1,
                                                     edgecolors='black')
                         ax.add_collection3d(shadow_poly)
         
-        # Set axis limits and labels
-        max_dim = max(self.L, self.D, self.H)
-        ax.set_xlim(-0.8*max_dim, 0.2*max_dim)
-        ax.set_ylim(0.2*max_dim, 1.2*max_dim)
-        ax.set_zlim(-0.6*max_dim, 0.4*max_dim)
-        
-        # Set equal aspect ratio
-        ax.set_box_aspect([1, 1, 1])  # This makes the axes equally scaled
-        
-        # Create info text
-        info_text = (
-            f"{case_name}\n"
-            f"φ_i={phi_i}°, θ_i={theta_i}°\n"
-            f"φ_o={phi_o}°, θ_o={theta_o}°\n"
-            f"SA Eff: {A_eff_SA:.2f} m²\n"
-            f"Chassis Eff: {A_eff_chassis:.2f} m²"
-        )
+            # Set axis limits and labels
+            max_dim = max(self.L, self.D, self.H)
+            ax.set_xlim(-0.8*max_dim, 0.2*max_dim)
+            ax.set_ylim(0.2*max_dim, 1.2*max_dim)
+            ax.set_zlim(-0.6*max_dim, 0.4*max_dim)
+        
+            # Set equal aspect ratio
+            ax.set_box_aspect([1, 1, 1])  # This makes the axes equally scaled
+        
+            # Create info text
+            info_text = (
+                f"{case_name}\n"
+                f"φ_i={phi_i}°, θ_i={theta_i}°\n"
+                f"φ_o={phi_o}°, θ_o={theta_o}°\n"
+                f"SA Eff: {A_eff_SA:.2f} m²\n"
+                f"Chassis Eff: {A_eff_chassis:.2f} m²"
+            )
         
-        # Remove all axis elements
-        ax.set_axis_off()  # This removes all axes, ticks, labels, and the frame
-        plt.subplots_adjust(left=0, right=0.5, bottom=0, top=1)
+            # Remove all axis elements
+            ax.set_axis_off()  # This removes all axes, ticks, labels, and the frame
+            plt.subplots_adjust(left=0, right=0.5, bottom=0, top=1)
         
-        # Add legend for the arrows
-        ax.legend(loc='upper right', bbox_to_anchor=(0.97, 1))
+            # Add legend for the arrows
+            ax.legend(loc='upper right', bbox_to_anchor=(0.97, 1))
         
-        # Set title (we'll use a text box instead of the default title)
-        fig.text(0.7, 0.8, info_text, 
-            ha='left', va='top', fontsize=10,
-            bbox=dict(facecolor='white', alpha=0.8, edgecolor='black'))
+            # Set title (we'll use a text box instead of the default title)
+            fig.text(0.7, 0.8, info_text, 
+                ha='left', va='top', fontsize=10,
+                bbox=dict(facecolor='white', alpha=0.8, edgecolor='black'))
         
-        ax.autoscale_view()  
+            ax.autoscale_view()  
 
-        plt.tight_layout()
-        plt.show()
+            plt.tight_layout()
+            fig.savefig(save_path, dpi=100)
 
-def main():
-    """Main function: calculates and prints the effective area"""
+def main(output_dir='scene_plots'):
+    """Main function: calculates and prints the effective area, saving each scene to output_dir"""
     calculator = ShadowCalculator()
+    os.makedirs(output_dir, exist_ok=True)
     
     # Define 8 test cases (phi_i, theta_i, phi_o, theta_o)
     test_cases = [
@@ -321,17 +486,19 @@ def main():
         (280, 15, 280, -30)     # case 4-4
     ]
     
-    for i, (phi_i, theta_i, phi_o, theta_o) in enumerate(test_cases, 1):
-        # Calculate the effective area
-        A_eff_SA, A_eff_chassis = calculator.calculate_effective_area(phi_i, theta_i, phi_o, theta_o)
-        
+    # Calculate the effective areas for all test cases at once
+    A_eff_SA_all, A_eff_chassis_all = calculator.calculate_effective_area_batch(*np.array(test_cases).T)
+    
+    for case_no, ((phi_i, theta_i, phi_o, theta_o), A_eff_SA, A_eff_chassis) in enumerate(
+            zip(test_cases, A_eff_SA_all, A_eff_chassis_all), start=1):
         print("=== Effective Area Calculation Results ===")
         print(f"Solar Array Effective Area: {A_eff_SA:.2f} m² (Original: {calculator.A_SA:.2f} m²)")
         print(f"Chassis Effective Area: {A_eff_chassis:.2f} m² (Original: {calculator.A_chassis:.2f} m²)")
         
         # Visualize the scene
-        print("\nGenerating 3D visualization...")
-        calculator.plot_scene_with_shadows(phi_i, theta_i, phi_o, theta_o)
+        save_path = os.path.join(output_dir, f"scene_{case_no}.png")
+        print(f"\nGenerating 3D visualization: {save_path}")
+        calculator.plot_scene_with_shadows(phi_i, theta_i, phi_o, theta_o, save_path)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(*sys.argv[1:2])
\ No newline at end of file
@@ -1,23 +1,21 @@
 import numpy as np
-import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 def fibonacci_sphere_sampling(samples=1000):
     """Generate evenly distributed points on a sphere using Fibonacci sampling."""
-    points = []
     phi = np.pi * (3. - np.sqrt(5.))  # Golden angle in radians
     
-    for i in range(samples):
-        y = 1 - (i / float(samples - 1)) * 2  # y goes from 1 to -1
-        radius = np.sqrt(1 - y * y)  # radius at y
-        
-        theta = phi * i  # Golden angle increment
-        
-        x = np.cos(theta) * radius
-        z = np.sin(theta) * radius
-        
-        points.append([x, y, z])
+    i = np.arange(samples)
+    y = 1 - (i / float(samples - 1)) * 2  # y goes from 1 to -1
+    radius = np.sqrt(1 - y * y)  # radius at y
     
-    return np.array(points)
+    theta = phi * i  # Golden angle increment
+    
+    x = np.cos(theta) * radius
+    z = np.sin(theta) * radius
+    
+    return np.stack([x, y, z], axis=1)
 
 # Generate points on the sphere
 samples = 1000
@@ -26,28 +24,21 @@ points = fibonacci_sphere_sampling(samples)
 # Create all possible pairs where:
 # - First point (i) can be any point on the sphere
 # - Second point (o) must be in lower hemisphere (z < 0)
-pairs = []
-for i in range(samples):
-    for o in range(samples):
-        if points[o][2] < 0:  # Check if o is in lower hemisphere (z < 0)
-            pairs.append((points[i], points[o]))
-
-# Convert to numpy array for easier handling
-pairs_array = np.array(pairs)
+lower_mask = points[:, 2] < 0  # Check which points are in lower hemisphere (z < 0)
+lower = points[lower_mask]
 
-# Create a DataFrame to store the pairs
-df_pairs = pd.DataFrame({
-    'i_x': pairs_array[:, 0, 0],
-    'i_y': pairs_array[:, 0, 1],
-    'i_z': pairs_array[:, 0, 2],
-    'o_x': pairs_array[:, 1, 0],
-    'o_y': pairs_array[:, 1, 1],
-    'o_z': pairs_array[:, 1, 2]
-})
+# Each point i is repeated once per lower-hemisphere point o, matching the (i, o) loop order.
+# Columns are built directly as contiguous float32 arrays, with no intermediate pairs array or DataFrame
+points = points.astype(np.float32)
+lower = lower.astype(np.float32)
+table = pa.Table.from_arrays(
+    [np.repeat(points[:, k], lower.shape[0]) for k in range(3)]
+    + [np.tile(lower[:, k], samples) for k in range(3)],
+    names=['i_x', 'i_y', 'i_z', 'o_x', 'o_y', 'o_z']
+)
 
-# Save to CSV
-output_path = r'C:...\NewCode\viewing_sphere_pairs.csv'
-df_pairs.to_csv(output_path, index=False)
-df_pairs.to_csv(output_path, index=False)
-print(f"Saved {len(pairs)} point pairs to {output_path}")
+# Save to Parquet (binary columnar, read back by EffectiveArea_Calculation_FromVectorPairs.py)
+output_path = r'C:...\NewCode\viewing_sphere_pairs.parquet'
+pq.write_table(table, output_path, compression='zstd')
+print(f"Saved {table.num_rows} point pairs to {output_path}")
 print(f"First point is arbitrary, second point is restricted to lower hemisphere (z < 0)")
\ No newline at end of file
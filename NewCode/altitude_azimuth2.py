@@ -1,26 +1,42 @@
+import numpy as np
 import pandas as pd
-import random
 
 # File paths
-input_path = r'...\NewCode\observer_frame_results.csv'
-output_path = r'...\NewCode\observer_frame_results_night.csv'
+input_path = r'...\NewCode\observer_frame_results.csv'  # Produced outside this repo, kept as CSV
+output_path = r'...\NewCode\observer_frame_results_night.parquet'
 
-# Read the original CSV file
-df = pd.read_csv(input_path)
+# Rows are read in chunks so the full file never has to be held in memory
+CHUNK_SIZE = 100_000
+COLUMNS = ['sun_alt', 'sun_az', 'sat_alt', 'sat_az', 'phase_angle', 'A_eff_SA', 'A_eff_chassis']
 
-# Filter rows where sun_alt is negative
-negative_sun_alt_df = df[df['sun_alt'] < 0]
+# First pass: count rows where sun_alt is negative, reading only that column
+total_rows = 0
+negative_rows = 0
+for chunk in pd.read_csv(input_path, usecols=['sun_alt'], chunksize=CHUNK_SIZE):
+    total_rows += len(chunk)
+    negative_rows += int((chunk['sun_alt'] < 0).sum())
 
 # Calculate sample size (approximately 4% of remaining rows)
-sample_size = len(negative_sun_alt_df) // 25
+sample_size = negative_rows // 25
 
-# Random sampling with fixed random_state for reproducibility
-# Remove random_state parameter if you want different samples each time
-sampled_df = negative_sun_alt_df.sample(n=sample_size, random_state=42)
+# Random sampling with fixed seed for reproducibility
+# Remove the seed if you want different samples each time
+rng = np.random.default_rng(42)
+chosen = np.sort(rng.choice(negative_rows, size=sample_size, replace=False))
 
-# Save sampled data to new CSV file
-sampled_df.to_csv(output_path, index=False)
+# Second pass: keep the chosen negative sun_alt rows chunk by chunk
+sampled_chunks = []
+seen = 0
+for chunk in pd.read_csv(input_path, usecols=COLUMNS, chunksize=CHUNK_SIZE):
+    negative_chunk = chunk[chunk['sun_alt'] < 0]
+    start, stop = np.searchsorted(chosen, [seen, seen + len(negative_chunk)])
+    sampled_chunks.append(negative_chunk.iloc[chosen[start:stop] - seen])
+    seen += len(negative_chunk)
+sampled_df = pd.concat(sampled_chunks)
 
+# Save sampled data to new Parquet file
+sampled_df.to_parquet(output_path, engine='pyarrow', compression='zstd', index=False)
 
-print(f"Original dataset had {len(df)} rows, {len(negative_sun_alt_df)} had negative sun_alt")
+
+print(f"Original dataset had {total_rows} rows, {negative_rows} had negative sun_alt")
 print(f"Successfully sampled {sample_size} rows (~10%) from negative sun_alt data and saved to: {output_path}")
\ No newline at end of file
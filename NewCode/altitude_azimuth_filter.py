@@ -1,28 +1,33 @@
+import math
 import numpy as np
 import pandas as pd
 
+def _norm3(v):
+    """Length of a 3-vector without going through np.linalg.norm"""
+    return math.sqrt(v[0] * v[0] + v[1] * v[1] + v[2] * v[2])
+
 def satellite_to_observer_frame(i_xyz, o_xyz):
     # Normalize input vectors
-    i_xyz = i_xyz / np.linalg.norm(i_xyz)
-    o_xyz = o_xyz / np.linalg.norm(o_xyz)
+    i_xyz = i_xyz / _norm3(i_xyz)
+    o_xyz = o_xyz / _norm3(o_xyz)
     
     # Calculate z_s (points to geocenter)
     z_s = -o_xyz
     
     # Calculate y_s (handle parallel case)
     cross_product = np.cross(z_s, i_xyz)
-    cross_norm = np.linalg.norm(cross_product)
+    cross_norm = _norm3(cross_product)
     if cross_norm < 1e-10:
         y_s = np.array([0.0, 1.0, 0.0])
         y_s = y_s - np.dot(y_s, z_s) * z_s
-        if np.linalg.norm(y_s) < 1e-10:
+        if _norm3(y_s) < 1e-10:
             y_s = np.array([1.0, 0.0, 0.0])
     else:
         y_s = cross_product / cross_norm
     
     # Calculate x_s (right-handed system)
     x_s = np.cross(y_s, z_s)
-    x_s = x_s / np.linalg.norm(x_s)
+    x_s = x_s / _norm3(x_s)
     
     # Construct transformation matrix
     T = np.vstack([x_s, y_s, z_s]).T
@@ -35,7 +40,55 @@ def satellite_to_observer_frame(i_xyz, o_xyz):
     def xyz_to_alt_az(v):
         x, y, z = v
         azimuth = np.arctan2(y, x) % (2 * np.pi)
-        altitude = np.arcsin(z / np.linalg.norm(v))
+        altitude = np.arcsin(z / _norm3(v))
+        return np.degrees(altitude), np.degrees(azimuth)
+    
+    sun_alt, sun_az = xyz_to_alt_az(v_sun_observer)
+    sat_alt, sat_az = xyz_to_alt_az(v_sat_observer)
+    
+    return sun_alt, sun_az, sat_alt, sat_az
+
+def satellite_to_observer_frame_batch(i_xyz, o_xyz):
+    """Vectorized satellite_to_observer_frame for (N, 3) arrays of vectors"""
+    # The vectors may be stored as float32; the geometry is computed in float64 so the 1e-10
+    # parallel-vector tolerances below stay meaningful (float32 only resolves ~1e-7)
+    i_xyz = np.asarray(i_xyz, dtype=np.float64)
+    o_xyz = np.asarray(o_xyz, dtype=np.float64)
+    
+    # Normalize input vectors
+    i_xyz = i_xyz / np.sqrt(np.einsum('ij,ij->i', i_xyz, i_xyz))[:, None]
+    o_xyz = o_xyz / np.sqrt(np.einsum('ij,ij->i', o_xyz, o_xyz))[:, None]
+    
+    # Calculate z_s (points to geocenter)
+    z_s = -o_xyz
+    
+    # Calculate y_s (handle parallel case with a mask)
+    cross_product = np.cross(z_s, i_xyz, axis=1)
+    cross_norm = np.sqrt(np.einsum('ij,ij->i', cross_product, cross_product))
+    parallel = cross_norm < 1e-10
+    
+    y_fallback = np.array([0.0, 1.0, 0.0]) - z_s[:, 1:2] * z_s
+    y_fallback_norm = np.sqrt(np.einsum('ij,ij->i', y_fallback, y_fallback))
+    y_fallback[y_fallback_norm < 1e-10] = [1.0, 0.0, 0.0]
+    
+    y_s = np.where(parallel[:, None], y_fallback,
+                   cross_product / np.where(parallel, 1.0, cross_norm)[:, None])
+    
+    # Calculate x_s (right-handed system)
+    x_s = np.cross(y_s, z_s, axis=1)
+    x_s = x_s / np.sqrt(np.einsum('ij,ij->i', x_s, x_s))[:, None]
+    
+    # Construct transformation matrices, shape (N, 3, 3) with x_s, y_s, z_s as columns
+    T = np.stack([x_s, y_s, z_s], axis=2)
+    
+    # Vector transformations
+    v_sun_observer = np.einsum('nij,nj->ni', T, i_xyz)
+    v_sat_observer = np.einsum('nij,nj->ni', T, -o_xyz)
+    
+    # Calculate altitude and azimuth
+    def xyz_to_alt_az(v):
+        azimuth = np.arctan2(v[:, 1], v[:, 0]) % (2 * np.pi)
+        altitude = np.arcsin(v[:, 2] / np.sqrt(np.einsum('ij,ij->i', v, v)))
         return np.degrees(altitude), np.degrees(azimuth)
     
     sun_alt, sun_az = xyz_to_alt_az(v_sun_observer)
@@ -45,35 +98,37 @@ def satellite_to_observer_frame(i_xyz, o_xyz):
 
 # Load data
 file_path = r"C:...\NewCode\filtered_angle_results.csv"
-data = pd.read_csv(file_path)
+# Only the columns used below, parsed straight to float32
+data = pd.read_csv(
+    file_path,
+    usecols=['i_x', 'i_y', 'i_z', 'o_x', 'o_y', 'o_z', 'phase_angle', 'A_eff_SA', 'A_eff_chassis'],
+    dtype='float32'
+)
 
 # Process data
-results = []
-for _, row in data.iterrows():
-    i_xyz = np.array([row['i_x'], row['i_y'], row['i_z']])
-    o_xyz = np.array([row['o_x'], row['o_y'], row['o_z']])
-    sun_alt, sun_az, sat_alt, sat_az = satellite_to_observer_frame(i_xyz, o_xyz)
-    
-    results.append({
-        'sun_alt': sun_alt,
-        'sun_az': sun_az,
-        'sat_alt': sat_alt,
-        'sat_az': sat_az,
-        'phase_angle': row['phase_angle'],
-        'A_eff_SA': row['A_eff_SA'],
-        'A_eff_chassis': row['A_eff_chassis']
-    })
+sun_alt, sun_az, sat_alt, sat_az = satellite_to_observer_frame_batch(
+    data[['i_x', 'i_y', 'i_z']].to_numpy(),
+    data[['o_x', 'o_y', 'o_z']].to_numpy()
+)
 
-# Convert to DataFrame and filter
-results_df = pd.DataFrame(results)
-sun_alt_condition = (results_df['sun_alt'] > -30) & (results_df['sun_alt'] < -10)
-sat_alt_condition = (results_df['sat_alt'] > 20) & (results_df['sat_alt'] < 90)
-filtered_df = results_df[sun_alt_condition & sat_alt_condition]
-'''sun_alt_condition =  (results_df['sun_alt'] < -10)
-sat_alt_condition = (results_df['sat_alt'] > 20) 
-filtered_df = results_df[sun_alt_condition & sat_alt_condition]'''
+# Filter on the result arrays, then build the DataFrame from the matching rows only
+sun_alt_condition = (sun_alt > -30) & (sun_alt < -10)
+sat_alt_condition = (sat_alt > 20) & (sat_alt < 90)
+mask = sun_alt_condition & sat_alt_condition
+'''sun_alt_condition =  (sun_alt < -10)
+sat_alt_condition = (sat_alt > 20) 
+mask = sun_alt_condition & sat_alt_condition'''
+filtered_df = pd.DataFrame({
+    'sun_alt': sun_alt[mask],
+    'sun_az': sun_az[mask],
+    'sat_alt': sat_alt[mask],
+    'sat_az': sat_az[mask],
+    'phase_angle': data['phase_angle'].to_numpy()[mask],
+    'A_eff_SA': data['A_eff_SA'].to_numpy()[mask],
+    'A_eff_chassis': data['A_eff_chassis'].to_numpy()[mask]
+})
 
 # Save filtered results
-output_path = r'...\NewCode\filtered_observer_frame_results.csv'
-filtered_df.to_csv(output_path, index=False)
+output_path = r'...\NewCode\filtered_observer_frame_results.parquet'
+filtered_df.to_parquet(output_path, engine='pyarrow', compression='zstd', index=False)
 print(f"Conversion completed. Filtered results saved  records matching criteria).")
\ No newline at end of file
@@ -1,6 +1,26 @@
+import math
 import pandas as pd
 import numpy as np
 
+# Angle limit with the negative z-axis; comparing cosines avoids arccos on every row
+MAX_ANGLE_DEG = 66
+COS_MAX_ANGLE = math.cos(math.radians(MAX_ANGLE_DEG))
+
+def calculate_cos_with_neg_z(data):
+    """
+    Calculate the cosine of the angle between each vector (o_x, o_y, o_z) and the negative z-axis (0,0,-1)
+    
+    Args:
+        data: DataFrame containing vector components o_x, o_y, o_z
+        
+    Returns:
+        Array of cosines
+    """
+    ox, oy, oz = data['o_x'].to_numpy(), data['o_y'].to_numpy(), data['o_z'].to_numpy()
+    # Zero vectors give NaN, which fails the angle filter
+    with np.errstate(invalid='ignore'):
+        return -oz / np.sqrt(ox*ox + oy*oy + oz*oz)
+
 def calculate_angle_with_neg_z(data):
     """
     Calculate the angle between each vector (o_x, o_y, o_z) and the negative z-axis (0,0,-1)
@@ -23,13 +43,16 @@ def main():
     """
     # 1. Read input data
     input_path = r'C:...\NewCode\results.csv'
-    data = pd.read_csv(input_path)
+    data = pd.read_csv(input_path, engine='pyarrow')  # Multithreaded Arrow CSV parser
     
-    # 2. Calculate angle with negative z-axis (0,0,-1)
-    data['angle_with_z'] = calculate_angle_with_neg_z(data)
+    # 2. Calculate cosine of the angle with negative z-axis (0,0,-1)
+    cos_angle = calculate_cos_with_neg_z(data)
     
-    # 3. Filter rows where angle < 66 degrees
-    filtered_data = data[data['angle_with_z'] < 66]
+    # 3. Filter rows where angle < 66 degrees (cosine is decreasing, so cos > cos(66°)),
+    # then convert only the kept rows to angles
+    mask = cos_angle > COS_MAX_ANGLE
+    filtered_data = data.loc[mask].copy()
+    filtered_data['angle_with_z'] = np.degrees(np.arccos(cos_angle[mask]))
     
     # 4. Save results to new CSV file
     output_path = r'C:...\NewCode\filtered_angle_results.csv'
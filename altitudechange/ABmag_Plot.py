@@ -1,3 +1,7 @@
+import multiprocessing
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Repository root, for sun_term.py
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
@@ -5,7 +9,7 @@ from astropy.time import Time
 import astropy.coordinates
 import lumos.conversions
 import lumos.calculator
-from satellite_models.starlink_v1p5 import Surface
+from sun_term import sun_geometry, surface_flux_per_area
 
 # Constants
 OBSERVER_LOCATION = astropy.coordinates.EarthLocation(lat=32.4434, lon=-110.7881)
@@ -13,88 +17,85 @@ SATELLITE_HEIGHT = 550 * 1000  # Convert km to meters
 SAT_AZ = 0  # Fixed satellite azimuth angle
 SUN_AZ = 180  # Fixed sun azimuth angle
 
-# Read input data
-input_path = r"...\effective_area_results.csv"
-df = pd.read_csv(input_path)
+# Base areas (modify these with actual values)
+BASE_SA_AREA = 10.0  # m²
+BASE_CHASSIS_AREA = 5.0  # m²
 
-def prepare_surfaces(sa_coeff, chassis_coeff):
+# Normal vectors (modify if needed)
+SOLAR_ARRAY_NORMAL = np.array([0, 0, 1])  # Z-axis normal
+CHASSIS_NORMAL = np.array([0, 1, 0])     # Y-axis normal
+
+# Placeholder BRDF values - both lab BRDFs are isotropic constants
+SOLAR_ARRAY_BRDF = 0.5  # Example isotropic BRDF value
+CHASSIS_BRDF = 0.3  # Example isotropic BRDF value
+
+def compute_intensity(phi_1, phi_2, chassis_areas, solar_array_areas):
     """
-    Prepare BRDF surfaces with effective area coefficients applied
+    Vectorized equivalent of lumos.calculator.get_intensity_observer_frame for
+    the two constant-BRDF surfaces (sunlight only, no earthshine)
     
     Args:
-        sa_coeff: Solar array effective area coefficient (0-1)
-        chassis_coeff: Chassis effective area coefficient (0-1)
+        phi_1: Satellite altitude angles (degrees)
+        phi_2: Sun altitude angles (degrees)
+        chassis_areas: Chassis effective areas (m²)
+        solar_array_areas: Solar array effective areas (m²)
     
     Returns:
-        List of Surface objects with adjusted areas
+        Flux of light incident on the observer (W / m^2)
+    """
+    geometry = sun_geometry(phi_1, SAT_AZ, SATELLITE_HEIGHT, phi_2, SUN_AZ)
+    return chassis_areas * surface_flux_per_area(CHASSIS_NORMAL, CHASSIS_BRDF, *geometry) \
+        + solar_array_areas * surface_flux_per_area(SOLAR_ARRAY_NORMAL, SOLAR_ARRAY_BRDF, *geometry)
+
+def compute_abmag(chunk):
     """
-    # Base areas (modify these with actual values)
-    BASE_SA_AREA = 10.0  # m²
-    BASE_CHASSIS_AREA = 5.0  # m²
+    Calculate the AB magnitudes of a chunk of observations
     
-    # Apply effective area coefficients
-    solar_array_area = BASE_SA_AREA * sa_coeff  
-    chassis_area = BASE_CHASSIS_AREA * chassis_coeff
+    Args:
+        chunk: (phi_1, phi_2, chassis_areas, solar_array_areas) tuple of arrays
     
-    # Normal vectors (modify if needed)
-    solar_array_normal = np.array([0, 0, 1])  # Z-axis normal
-    chassis_normal = np.array([0, 1, 0])     # Y-axis normal
+    Returns:
+        Array of AB magnitudes
+    """
+    intensity = compute_intensity(*chunk)
     
-    # Placeholder BRDF functions - replace with actual implementations
-    def lab_solar_array_brdf(theta_i, theta_o, phi_i, phi_o):
-        """Placeholder for solar array BRDF function"""
-        return 0.5  # Example isotropic BRDF value
+    # Convert intensity to AB magnitude
+    return lumos.conversions.intensity_to_ab_mag(intensity)
+
+if __name__ == '__main__':
+    # Read input data
+    input_path = r"...\effective_area_results.csv"
+    df = pd.read_csv(input_path)
     
-    def lab_chassis_brdf(theta_i, theta_o, phi_i, phi_o):
-        """Placeholder for chassis BRDF function"""
-        return 0.3  # Example isotropic BRDF value
+    # Apply effective area coefficients to all observations at once
+    chassis_areas = BASE_CHASSIS_AREA * df['Chassis_coeff'].to_numpy()  # Chassis effective area coefficient
+    solar_array_areas = BASE_SA_AREA * df['SA_coeff'].to_numpy()  # Solar array effective area coefficient
     
-    return [
-        Surface(chassis_area, chassis_normal, lab_chassis_brdf),
-        Surface(solar_array_area, solar_array_normal, lab_solar_array_brdf)
-    ]
-
-# Calculate AB magnitude for each observation
-ab_mags = []
-for _, row in df.iterrows():
-    phi_1 = row['phi_1 (deg)']  # Satellite altitude angle
-    phi_2 = row['phi_2 (deg)']  # Sun altitude angle
-    sa_coeff = row['SA_coeff']   # Solar array effective area coefficient
-    chassis_coeff = row['Chassis_coeff']  # Chassis effective area coefficient
+    # Calculate AB magnitudes; each core evaluates one contiguous chunk of rows
+    n_chunks = multiprocessing.cpu_count()
+    chunks = zip(
+        np.array_split(df['phi_1 (deg)'].to_numpy(dtype=float), n_chunks),  # Satellite altitude angle
+        np.array_split(df['phi_2 (deg)'].to_numpy(dtype=float), n_chunks),  # Sun altitude angle
+        np.array_split(chassis_areas, n_chunks),
+        np.array_split(solar_array_areas, n_chunks))
+    with multiprocessing.Pool() as pool:
+        ab_mags = pool.map(compute_abmag, chunks)
     
-    # Prepare surfaces with effective area coefficients applied
-    surfaces = prepare_surfaces(sa_coeff, chassis_coeff)
+    # Add results to DataFrame
+    df['ABmag'] = np.concatenate(ab_mags)
     
-    # Calculate observed intensity
-    intensity = lumos.calculator.get_intensity_observer_frame(
-        surfaces,
-        SATELLITE_HEIGHT,
-        phi_1,    # Satellite altitude angle (degrees)
-        SAT_AZ,   # Satellite azimuth angle (degrees)
-        phi_2,    # Sun altitude angle (degrees)
-        SUN_AZ,   # Sun azimuth angle (degrees)
-        include_earthshine=False
-    )
+    # Plot AB magnitude vs phi_1 (satellite altitude angle)
+    plt.figure(figsize=(10, 6))
+    plt.plot(df['phi_1 (deg)'], df['ABmag'], 'b-', linewidth=2, label='AB Magnitude')
+    plt.xlabel('Satellite Altitude Angle (phi_1) [deg]', fontsize=12)
+    plt.ylabel('AB Magnitude', fontsize=12)
+    plt.title('Satellite Brightness vs Observation Angle', fontsize=14)
+    plt.grid(True, linestyle='--', alpha=0.7)
+    plt.legend(fontsize=12)
+    plt.tight_layout()
+    plt.show()
     
-    # Convert intensity to AB magnitude
-    ab_mag = lumos.conversions.intensity_to_ab_mag(intensity)
-    ab_mags.append(ab_mag)
-
-# Add results to DataFrame
-df['ABmag'] = ab_mags
-
-# Plot AB magnitude vs phi_1 (satellite altitude angle)
-plt.figure(figsize=(10, 6))
-plt.plot(df['phi_1 (deg)'], df['ABmag'], 'b-', linewidth=2, label='AB Magnitude')
-plt.xlabel('Satellite Altitude Angle (phi_1) [deg]', fontsize=12)
-plt.ylabel('AB Magnitude', fontsize=12)
-plt.title('Satellite Brightness vs Observation Angle', fontsize=14)
-plt.grid(True, linestyle='--', alpha=0.7)
-plt.legend(fontsize=12)
-plt.tight_layout()
-plt.show()
-
-# Save results
-output_path = r"...\abmag_results.csv"
-df.to_csv(output_path, index=False)
-print(f"Results successfully saved to: {output_path}")
\ No newline at end of file
+    # Save results
+    output_path = r"...\abmag_results.csv"
+    df.to_csv(output_path, index=False)
+    print(f"Results successfully saved to: {output_path}")
\ No newline at end of file
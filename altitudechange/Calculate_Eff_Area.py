@@ -1,5 +1,5 @@
 import pandas as pd
-import math
+import numpy as np
 import os
 
 # Constants
@@ -10,33 +10,30 @@ L = 1.3  # Length parameter
 input_path = r"...\sampling_results_27.csv"
 output_path = r"...\effective_area_27.csv"
 
-def calculate_effective_area(row):
+def calculate_effective_area(phi1, phi_ob, phi_sun):
     """
     Calculate effective area coefficients for SA and Chassis based on given conditions
     
     Args:
-        row: DataFrame row containing angle values
+        phi1: Array of phi_1 angles (deg)
+        phi_ob: Array of phi_ob angles (deg)
+        phi_sun: Array of phi_sun angles (deg)
     
     Returns:
-        pd.Series: SA coefficient and Chassis coefficient
+        tuple: SA coefficient array and Chassis coefficient array
     """
-    phi1 = row['phi_1 (deg)']
-    phi_ob = row['phi_ob (deg)']
-    phi_sun = row['phi_sun (deg)']
-    
     # Calculate SA effective area coefficient
-    if phi1 < 90:
-        min_angle = min(phi_ob, phi_sun)
-        # Compute 1 - (L/H)*cot(min_angle) where cot(x) = 1/tan(x)
-        sa_coeff = 1 - (L / H) * (1 / math.tan(math.radians(min_angle))) if min_angle > 0 else 0
-        sa_coeff = max(sa_coeff, 0)  # Ensure non-negative value
-    else:
-        sa_coeff = 0  # SA coefficient is 0 when phi1 >= 90
+    # Compute 1 - (L/H)*cot(min_angle) where cot(x) = 1/tan(x), only for positive angles
+    min_angle = np.minimum(phi_ob, phi_sun)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sa_coeff = 1 - (L / H) / np.tan(np.radians(min_angle))
+    sa_coeff = np.where(min_angle > 0, np.maximum(sa_coeff, 0.0), 0.0)  # Ensure non-negative value
+    sa_coeff = np.where(phi1 < 90, sa_coeff, 0.0)  # SA coefficient is 0 when phi1 >= 90
     
     # Calculate Chassis effective area coefficient
-    chassis_coeff = 0 if phi_sun < 0 else 1  # 0 if phi_sun negative, else 1
+    chassis_coeff = np.where(phi_sun < 0, 0.0, 1.0)  # 0 if phi_sun negative, else 1
     
-    return pd.Series([sa_coeff, chassis_coeff])
+    return sa_coeff, chassis_coeff
 
 # Main execution
 try:
@@ -60,7 +57,11 @@ try:
         raise ValueError(f"Required columns missing in CSV file: {missing}")
     
     # Calculate effective area coefficients
-    df[['SA_coeff', 'Chassis_coeff']] = df.apply(calculate_effective_area, axis=1)
+    df['SA_coeff'], df['Chassis_coeff'] = calculate_effective_area(
+        df['phi_1 (deg)'].to_numpy(),
+        df['phi_ob (deg)'].to_numpy(),
+        df['phi_sun (deg)'].to_numpy()
+    )
     
     # Reorder columns for better readability
     output_columns = ['phi_1 (deg)', 'phi_2 (deg)', 'phi_ob (deg)', 'phi_sun (deg)', 
@@ -1,119 +1,195 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Repository root, for sun_term.py
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+from pyarrow import csv as pa_csv
+from joblib import Parallel, cpu_count, delayed
 from astropy.time import Time
 import astropy.coordinates
 import lumos.conversions
 import lumos.calculator
-from satellite_models.starlink_v1p5 import Surface
-from lumos.brdf.library import BINOMIAL, PHONG
+from lumos.brdf.library import PHONG
+from numba import njit
+from sun_term import sun_geometry, surface_flux_per_area
+
+@njit(cache=True)
+def _binomial_kernel(B, C, d, l1, ix, iy, iz, nx, ny, nz, ox, oy, oz):
+    """
+    Greynolds binomial BRDF (same model as lumos.brdf.library.BINOMIAL) evaluated row by row.
+    Both polynomials are evaluated with Horner's rule and d**(i + l1) is computed once.
+    Serial on purpose: it runs inside the joblib workers, which already use every core.
+    """
+    n, m = B.shape
+    j = C.shape[1]
+    d_pow = np.empty(j)
+    for i in range(j):
+        d_pow[i] = d ** (i + l1)
+    
+    out = np.zeros(ix.shape[0])
+    for r in range(ix.shape[0]):
+        cos_in = ix[r] * nx[r] + iy[r] * ny[r] + iz[r] * nz[r]
+        cos_out = ox[r] * nx[r] + oy[r] * ny[r] + oz[r] * nz[r]
+        if cos_in < 0 or cos_out < 0:
+            continue
+        
+        # Specular reflection of the incident vector and both projections onto the surface plane
+        rx = 2 * cos_in * nx[r] - ix[r]
+        ry = 2 * cos_in * ny[r] - iy[r]
+        rz = 2 * cos_in * nz[r] - iz[r]
+        rho_x = ox[r] - cos_out * nx[r]
+        rho_y = oy[r] - cos_out * ny[r]
+        rho_z = oz[r] - cos_out * nz[r]
+        dot = rx * nx[r] + ry * ny[r] + rz * nz[r]
+        rho0_x = rx - dot * nx[r]
+        rho0_y = ry - dot * ny[r]
+        rho0_z = rz - dot * nz[r]
+        
+        D2 = (rho_x - rho0_x)**2 + (rho_y - rho0_y)**2 + (rho_z - rho0_z)**2
+        D = np.sqrt(D2)
+        V = rho_x * rho0_x + rho_y * rho0_y + rho_z * rho0_z
+        
+        log_brdf = 0.0
+        for k in range(n - 1, -1, -1):
+            term_1 = 0.0
+            for i in range(m - 1, -1, -1):
+                term_1 = term_1 * D + B[k, i]
+            term_2 = 0.0
+            for i in range(j):
+                term_2 += C[k, i] * np.log10(1 + d_pow[i] * D2)
+            log_brdf = log_brdf * V + term_1 + 0.5 * term_2
+        out[r] = 10**log_brdf
+    return out
+
+def BINOMIAL(B, C, d, l1):
+    """
+    Drop-in replacement for lumos.brdf.library.BINOMIAL backed by the compiled kernel above.
+    Vector components may be scalars or arrays; they are broadcast against each other.
+    """
+    B = np.ascontiguousarray(B, dtype=np.float64)
+    C = np.ascontiguousarray(C, dtype=np.float64)
+    
+    def BRDF(incident_vector, normal_vector, outgoing_vector):
+        components = np.broadcast_arrays(*incident_vector, *normal_vector, *outgoing_vector)
+        shape = components[0].shape
+        flat = [np.ascontiguousarray(c, dtype=np.float64).ravel() for c in components]
+        return _binomial_kernel(B, C, float(d), l1, *flat).reshape(shape)
+    
+    return BRDF
 
 # Constants
 OBSERVER_LOCATION = astropy.coordinates.EarthLocation(lat=32.4434, lon=-110.7881)
 SATELLITE_HEIGHT = 550 * 1000  # Convert km to meters
 SAT_AZ = 10  # Fixed satellite azimuth angle
 SUN_AZ = 180  # Fixed sun azimuth angle
+CSV_BLOCK_SIZE = 4 << 20  # Bytes of CSV parsed per streamed block (~50k rows)
+
+# Base areas from Starlink v1.5 specifications
+BASE_SA_AREA = 22.68  # m² (solar array)
+BASE_CHASSIS_AREA = 3.65  # m² (chassis)
 
-# Read input data
-input_path = r"C:\Users\27549\Desktop\course_file\presonal_project\Satellite_Optical_Brightness_MSc_Project\altitudechange\effective_area_3_new.csv"
-output_path = r"C:\Users\27549\Desktop\course_file\presonal_project\Satellite_Optical_Brightness_MSc_Project\altitudechange\abmag_3_new.csv"
-df = pd.read_csv(input_path)
+# Normal vectors for Starlink v1.5
+CHASSIS_NORMAL = np.array([0.353553, 0.353553, -0.866025])  # 更新后的底盘法向量
+SOLAR_ARRAY_NORMAL = np.array([0.933013, -0.066987, 0.353553])  # 更新后的太阳能电池板法向量
 
-def prepare_surfaces(sa_coeff, chassis_coeff):
+# Lab-measured BRDF parameters for chassis (from Scatterworks measurements)
+B_chassis = np.array([[3.34, -98.085]])
+C_chassis = np.array([[-999.999, 867.538, 1000., 1000., -731.248, 618.552, 
+                      -294.054, 269.248, -144.853, 75.196]])
+LAB_CHASSIS_BRDF = BINOMIAL(B_chassis, C_chassis, d=3.0, l1=-5)
+
+# Lab-measured BRDF parameters for solar array (from Scatterworks measurements)
+B_solar = np.array([[0.534, -20.409]])
+C_solar = np.array([[-527.765, 1000., -676.579, 430.596, -175.806, 57.879]])
+LAB_SOLAR_ARRAY_BRDF = BINOMIAL(B_solar, C_solar, d=3.0, l1=-3)
+
+def compute_unit_intensities(phi_1, phi_2):
     """
-    Prepare BRDF surfaces with effective area coefficients applied, using actual Starlink v1.5 BRDF models.
+    Flux per unit area scattered by the Starlink v1.5 chassis and solar array, i.e. the
+    lumos get_intensity_observer_frame sun term (no earthshine) with the areas factored out.
+    Geometry and BRDFs are evaluated once here and shared by every set of areas.
     
     Args:
-        sa_coeff: Solar array effective area coefficient (0-1)
-        chassis_coeff: Chassis effective area coefficient (0-1)
+        phi_1: Satellite altitude angles (degrees)
+        phi_2: Sun altitude angles (degrees)
     
     Returns:
-        Tuple of (adjusted_surfaces, original_surfaces) where:
-        - adjusted_surfaces: List of Surface objects with adjusted areas
-        - original_surfaces: List of Surface objects with base areas
+        Tuple of (chassis, solar_array) flux per m² of surface (W / m^2 / m^2)
     """
-    # Base areas from Starlink v1.5 specifications
-    BASE_SA_AREA = 22.68  # m² (solar array)
-    BASE_CHASSIS_AREA = 3.65  # m² (chassis)
-    
-    # Apply effective area coefficients for adjusted surfaces
-    solar_array_area = BASE_SA_AREA * sa_coeff  
-    chassis_area = BASE_CHASSIS_AREA * chassis_coeff
+    geometry = sun_geometry(phi_1, SAT_AZ, SATELLITE_HEIGHT, phi_2, SUN_AZ)
+    return tuple(surface_flux_per_area(normal, brdf, *geometry)
+                 for normal, brdf in ((CHASSIS_NORMAL, LAB_CHASSIS_BRDF), (SOLAR_ARRAY_NORMAL, LAB_SOLAR_ARRAY_BRDF)))
 
-    # Normal vectors for Starlink v1.5
-    chassis_normal = np.array([0.353553, 0.353553, -0.866025])  # 更新后的底盘法向量
-    solar_array_normal = np.array([0.933013, -0.066987, 0.353553])  # 更新后的太阳能电池板法向量
+def compute_intensity(chassis_areas, solar_array_areas, unit_intensities):
+    """
+    Combine precomputed per-surface unit intensities with a set of surface areas.
     
-    # Lab-measured BRDF parameters for chassis (from Scatterworks measurements)
-    B_chassis = np.array([[3.34, -98.085]])
-    C_chassis = np.array([[-999.999, 867.538, 1000., 1000., -731.248, 618.552, 
-                          -294.054, 269.248, -144.853, 75.196]])
-    lab_chassis_brdf = BINOMIAL(B_chassis, C_chassis, d=3.0, l1=-5)
+    Args:
+        chassis_areas: Chassis areas (m²), array or scalar
+        solar_array_areas: Solar array areas (m²), array or scalar
+        unit_intensities: (chassis, solar_array) tuple from compute_unit_intensities
     
-    # Lab-measured BRDF parameters for solar array (from Scatterworks measurements)
-    B_solar = np.array([[0.534, -20.409]])
-    C_solar = np.array([[-527.765, 1000., -676.579, 430.596, -175.806, 57.879]])
-    lab_solar_array_brdf = BINOMIAL(B_solar, C_solar, d=3.0, l1=-3)
+    Returns:
+        Flux of light incident on the observer (W / m^2)
+    """
+    chassis_unit, solar_array_unit = unit_intensities
+    return chassis_areas * chassis_unit + solar_array_areas * solar_array_unit
+
+def _process(chunk):
+    """
+    Calculate AB magnitudes for one chunk of observations.
     
-    # Create both adjusted and original surfaces
-    adjusted_surfaces = [
-        Surface(chassis_area, chassis_normal, lab_chassis_brdf),
-        Surface(solar_array_area, solar_array_normal, lab_solar_array_brdf)
-    ]
+    Args:
+        chunk: (n, 4) array of phi_1 (deg), phi_2 (deg), SA_coeff and Chassis_coeff columns
     
-    original_surfaces = [
-        Surface(BASE_CHASSIS_AREA, chassis_normal, lab_chassis_brdf),
-        Surface(BASE_SA_AREA, solar_array_normal, lab_solar_array_brdf)
-    ]
+    Returns:
+        Tuple of (ab_mags, ab_mags_origin) arrays for the adjusted and original surfaces
+    """
+    # Satellite altitude angle, sun altitude angle, solar array and chassis effective area coefficients
+    phi_1, phi_2, sa_coeff, chassis_coeff = chunk.T
     
-    return adjusted_surfaces, original_surfaces
+    # Geometry and BRDFs are shared; adjusted surfaces use the effective area coefficients,
+    # original surfaces the base areas
+    unit_intensities = compute_unit_intensities(phi_1, phi_2)
+    intensity = compute_intensity(BASE_CHASSIS_AREA * chassis_coeff, BASE_SA_AREA * sa_coeff, unit_intensities)
+    intensity_origin = compute_intensity(BASE_CHASSIS_AREA, BASE_SA_AREA, unit_intensities)
+    return (lumos.conversions.intensity_to_ab_mag(intensity),
+            lumos.conversions.intensity_to_ab_mag(intensity_origin))
 
-# Calculate AB magnitudes for each observation
-ab_mags = []
-ab_mags_origin = []
-for _, row in df.iterrows():
-    phi_1 = row['phi_1 (deg)']  # Satellite altitude angle
-    phi_2 = row['phi_2 (deg)']  # Sun altitude angle
-    sa_coeff = row['SA_coeff']   # Solar array effective area coefficient
-    chassis_coeff = row['Chassis_coeff']  # Chassis effective area coefficient
+if __name__ == '__main__':
+    # Read input data
+    input_path = r"C:\Users\27549\Desktop\course_file\presonal_project\Satellite_Optical_Brightness_MSc_Project\altitudechange\effective_area_3_new.csv"
+    output_path = r"C:\Users\27549\Desktop\course_file\presonal_project\Satellite_Optical_Brightness_MSc_Project\altitudechange\abmag_3_new.csv"
+    output_columns = ['phi_1 (deg)', 'phi_2 (deg)', 'solarAngle (deg)', 
+                     'SA_coeff', 'Chassis_coeff', 'ABmag', 'ABmag_Origin']
     
-    # Prepare both adjusted and original surfaces
-    adjusted_surfaces, original_surfaces = prepare_surfaces(sa_coeff, chassis_coeff)
+    # Stream the CSV in blocks with the Arrow parser so memory stays bounded; numeric columns are
+    # pinned to float64 because Arrow fixes column types from the first block
+    reader = pa_csv.open_csv(
+        input_path, read_options=pa_csv.ReadOptions(block_size=CSV_BLOCK_SIZE),
+        convert_options=pa_csv.ConvertOptions(column_types=dict.fromkeys(
+            ['phi_1 (deg)', 'phi_2 (deg)', 'solarAngle (deg)', 'SA_coeff', 'Chassis_coeff'], pa.float64())))
     
-    # Calculate observed intensity for adjusted surfaces
-    intensity = lumos.calculator.get_intensity_observer_frame(
-        adjusted_surfaces,
-        SATELLITE_HEIGHT,
-        phi_1,    # Satellite altitude angle (degrees)
-        SAT_AZ,   # Satellite azimuth angle (degrees)
-        phi_2,    # Sun altitude angle (degrees)
-        SUN_AZ,   # Sun azimuth angle (degrees)
-        include_earthshine=False
-    )
-    ab_mag = lumos.conversions.intensity_to_ab_mag(intensity)
-    ab_mags.append(ab_mag)
+    # Create the output with its header up front, so an empty input still replaces an old result file
+    pd.DataFrame(columns=output_columns).to_csv(output_path, index=False)
     
-    # Calculate observed intensity for original surfaces
-    intensity_origin = lumos.calculator.get_intensity_observer_frame(
-        original_surfaces,
-        SATELLITE_HEIGHT,
-        phi_1,
-        SAT_AZ,
-        phi_2,
-        SUN_AZ,
-        include_earthshine=False
-    )
-    ab_mag_origin = lumos.conversions.intensity_to_ab_mag(intensity_origin)
-    ab_mags_origin.append(ab_mag_origin)
-
-# Add results to DataFrame while preserving solarAngle column
-df['ABmag'] = ab_mags
-df['ABmag_Origin'] = ab_mags_origin
-
-# Ensure solarAngle column exists in output (if it existed in input)
-output_columns = ['phi_1 (deg)', 'phi_2 (deg)', 'solarAngle (deg)', 
-                 'SA_coeff', 'Chassis_coeff', 'ABmag', 'ABmag_Origin']
-df = df[output_columns]  # This will keep only specified columns in the output
-
-# Save results
-df.to_csv(output_path, index=False)
-print(f"Results successfully saved to: {output_path}")
\ No newline at end of file
+    # The worker pool is reused across blocks
+    with Parallel(n_jobs=-1, backend='loky') as parallel:
+        for batch in reader:
+            df = batch.to_pandas()
+            
+            # Rows are independent: evaluate one chunk of the block per core
+            columns = df[['phi_1 (deg)', 'phi_2 (deg)', 'SA_coeff', 'Chassis_coeff']].to_numpy(dtype=float)
+            chunks = np.array_split(columns, cpu_count())
+            results = parallel(delayed(_process)(chunk) for chunk in chunks)
+            ab_mags, ab_mags_origin = (np.concatenate(r) for r in zip(*results))
+            
+            # Add results to DataFrame while preserving solarAngle column
+            df['ABmag'] = ab_mags
+            df['ABmag_Origin'] = ab_mags_origin
+            
+            # Keep only the output columns and append the block
+            df[output_columns].to_csv(output_path, mode='a', header=False, index=False)
+    
+    print(f"Results successfully saved to: {output_path}")
\ No newline at end of file
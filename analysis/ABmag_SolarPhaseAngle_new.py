@@ -1,7 +1,160 @@
 import math
+from functools import lru_cache
+import numpy as np
 import pandas as pd
-from shapely.geometry import Polygon
-from shapely.ops import unary_union
+import pyarrow as pa
+from pyarrow import csv as pa_csv, parquet as pq
+from numba import njit, prange
+
+
+@njit(cache=True)
+def clip_shadow(D, H, L, phi_deg, theta_deg):
+    """
+    Shadow of the chassis on the solar array: the light-direction parallelogram clipped
+    to the rectangle (0,0)-(D,H) with Sutherland-Hodgman. Returns ((n, 2) vertices, area).
+    """
+    # Clipping a quadrilateral by four half-planes gives at most 8 vertices
+    src = np.empty((8, 2))
+    dst = np.empty((8, 2))
+    
+    # Handle vertical case (phi = 90°), same tolerance as math.isclose(phi_mod, 90, abs_tol=1e-9)
+    phi_mod = phi_deg % 180
+    if abs(phi_mod - 90) <= max(1e-9 * max(phi_mod, 90.0), 1e-9):
+        # Vertical light source creates a rectangular shadow
+        x_offset, y_offset = 0.0, L
+    else:
+        # Trigonometric calculations: one sin/cos pair per angle, no tan
+        phi = math.radians(phi_deg)
+        theta = math.radians(theta_deg)
+        sp, cp = math.sin(phi), math.cos(phi)
+        st, ct = math.sin(theta), math.cos(theta)
+        
+        if sp * cp < 1e-10 * cp * cp or L * abs(cp) > 1e6 * abs(sp):
+            # tan(phi) < 1e-10 or |L*cot(phi)| > 1e6 (grazing light): keep the original
+            # 1 / max(1e-10, tan(phi)) guard and the per-component ±1e6 clamp (避免除以零)
+            cot_phi = cp / sp if sp * cp >= 1e-10 * cp * cp else 1 / 1e-10
+            x_offset = max(-1e6, min(1e6, L * cot_phi * st))
+            y_offset = max(-1e6, min(1e6, L * cot_phi * ct))
+        else:
+            # The clamp cannot bind here, so the offsets are used as they are
+            cot_phi = cp / sp
+            x_offset = L * cot_phi * st
+            y_offset = L * cot_phi * ct
+    
+    # Parallelogram vertices (unbounded shadow)
+    src[0, 0], src[0, 1] = 0.0, 0.0
+    src[1, 0], src[1, 1] = D, 0.0
+    src[2, 0], src[2, 1] = D - x_offset, y_offset
+    src[3, 0], src[3, 1] = -x_offset, y_offset
+    n = 4
+    
+    # Clip against x >= 0, x <= D, y >= 0, y <= H
+    for edge in range(4):
+        axis = edge // 2
+        keep_below = edge % 2 == 1
+        bound = 0.0 if not keep_below else (D if axis == 0 else H)
+        
+        m = 0
+        if n > 0:
+            prev_x, prev_y = src[n - 1, 0], src[n - 1, 1]
+            prev_inside = src[n - 1, axis] <= bound if keep_below else src[n - 1, axis] >= bound
+            for k in range(n):
+                cur_x, cur_y = src[k, 0], src[k, 1]
+                cur_inside = src[k, axis] <= bound if keep_below else src[k, axis] >= bound
+                if cur_inside != prev_inside:
+                    prev_c = prev_x if axis == 0 else prev_y
+                    cur_c = cur_x if axis == 0 else cur_y
+                    t = (bound - prev_c) / (cur_c - prev_c)
+                    dst[m, 0] = prev_x + t * (cur_x - prev_x)
+                    dst[m, 1] = prev_y + t * (cur_y - prev_y)
+                    m += 1
+                if cur_inside:
+                    dst[m, 0], dst[m, 1] = cur_x, cur_y
+                    m += 1
+                prev_x, prev_y, prev_inside = cur_x, cur_y, cur_inside
+        src, dst = dst, src
+        n = m
+    
+    # Shoelace formula
+    area = 0.0
+    for k in range(n):
+        j = (k + 1) % n
+        area += src[k, 0] * src[j, 1] - src[j, 0] * src[k, 1]
+    area = abs(area) / 2
+    
+    if n < 3 or area == 0:
+        return src[:0].copy(), 0.0
+    return src[:n].copy(), area
+
+
+@njit(cache=True)
+def clip_shadow_area(D, H, L, phi_deg, theta_deg):
+    """Area of the shadow returned by clip_shadow"""
+    return clip_shadow(D, H, L, phi_deg, theta_deg)[1]
+
+
+@njit(cache=True)
+def poly_intersection_area(poly_a, poly_b):
+    """Area of the intersection of polygon A with convex polygon B (Sutherland-Hodgman of A against B)"""
+    n, n_clip = poly_a.shape[0], poly_b.shape[0]
+    if n < 3 or n_clip < 3:
+        return 0.0
+    
+    # Orientation of B decides which side of each edge is inside
+    orientation = 0.0
+    for k in range(n_clip):
+        j = (k + 1) % n_clip
+        orientation += poly_b[k, 0] * poly_b[j, 1] - poly_b[j, 0] * poly_b[k, 1]
+    sign = 1.0 if orientation > 0 else -1.0
+    
+    # Each clip edge adds at most one vertex
+    src = np.empty((n + n_clip, 2))
+    dst = np.empty((n + n_clip, 2))
+    src[:n] = poly_a
+    
+    for e in range(n_clip):
+        ax, ay = poly_b[e, 0], poly_b[e, 1]
+        ex, ey = poly_b[(e + 1) % n_clip, 0] - ax, poly_b[(e + 1) % n_clip, 1] - ay
+        
+        m = 0
+        if n > 0:
+            prev_x, prev_y = src[n - 1, 0], src[n - 1, 1]
+            prev_side = sign * (ex * (prev_y - ay) - ey * (prev_x - ax))
+            for k in range(n):
+                cur_x, cur_y = src[k, 0], src[k, 1]
+                cur_side = sign * (ex * (cur_y - ay) - ey * (cur_x - ax))
+                if (cur_side >= 0) != (prev_side >= 0):
+                    t = prev_side / (prev_side - cur_side)
+                    dst[m, 0] = prev_x + t * (cur_x - prev_x)
+                    dst[m, 1] = prev_y + t * (cur_y - prev_y)
+                    m += 1
+                if cur_side >= 0:
+                    dst[m, 0], dst[m, 1] = cur_x, cur_y
+                    m += 1
+                prev_x, prev_y, prev_side = cur_x, cur_y, cur_side
+        src, dst = dst, src
+        n = m
+    
+    # Shoelace formula
+    area = 0.0
+    for k in range(n):
+        j = (k + 1) % n
+        area += src[k, 0] * src[j, 1] - src[j, 0] * src[k, 1]
+    return abs(area) / 2
+
+
+@njit(cache=True)
+def non_shadow_area(D, H, L, phi_i, theta_i, phi_o, theta_o):
+    """Solar array area outside both shadows: rectangle minus the union (inclusion-exclusion)"""
+    v_i, area_i = clip_shadow(D, H, L, phi_i, theta_i)
+    v_o, area_o = clip_shadow(D, H, L, phi_o, theta_o)
+    return D * H - (area_i + area_o - poly_intersection_area(v_i, v_o))
+
+
+@lru_cache(maxsize=200_000)
+def _special_case_cached(L, D, H, phi_i_adj, theta_i_r, phi_o_adj, theta_o_r):
+    """non_shadow_area memoized on (rounded) angles, since observation sweeps repeat geometries"""
+    return non_shadow_area(D, H, L, phi_i_adj, theta_i_r, phi_o_adj, theta_o_r)
 
 
 class ShadowCalculator:
@@ -54,73 +207,22 @@ class ShadowCalculator:
     
     def get_quadrant(self, phi_deg):
         """Determine which quadrant phi is in (1-4)"""
-        phi = phi_deg % 360
-        if 0 <= phi < 90:
-            return 1
-        elif 90 <= phi < 180:
-            return 2
-        elif 180 <= phi < 270:
-            return 3
-        else:
-            return 4
+        # Floor division keeps negative angles in the right quadrant; & 3 wraps it to 0-3
+        return 1 + (int(phi_deg // 90) & 3)
     
     def calculate_shadow(self, phi_deg, theta_deg):
         """Calculate shadow vertices as the intersection of the parallelogram and the solar array rectangle"""
-        # Angle conversion
-        phi = math.radians(phi_deg)
-        theta = math.radians(theta_deg)
-        
-        # Handle vertical case (phi = 90°)
-        if math.isclose(phi_deg % 180, 90, abs_tol=1e-9):
-            # Vertical light source creates a rectangular shadow
-            shadow_poly = Polygon([(0, 0), (self.D, 0), (self.D, self.L), (0, self.L)])
-        else:
-            # Trigonometric calculations
-            # 在三角函数计算前限制数值范围
-            cot_phi = 1 / max(1e-10, math.tan(phi))  # 避免除以零
-            x_offset = self.L * cot_phi * math.sin(theta)
-            y_offset = self.L * cot_phi * math.cos(theta)
-
-            # 限制偏移量范围
-            x_offset = max(-1e6, min(1e6, x_offset))
-            y_offset = max(-1e6, min(1e6, y_offset))
-            
-            # Parallelogram vertices (unbounded shadow)
-            shadow_poly = Polygon([
-                (0, 0),
-                (self.D, 0),
-                (self.D - x_offset, y_offset),
-                (-x_offset, y_offset)
-            ])
-        
-        # Solar array rectangle (0,0) to (D, H)
-        solar_array_rect = Polygon([(0, 0), (self.D, 0), (self.D, self.H), (0, self.H)])
-        
-        # Compute intersection (actual shadow shape)
-        shadow_intersection = shadow_poly.intersection(solar_array_rect)
-        
-        # Extract vertices
-        if shadow_intersection.is_empty:
-            vertices = []
-            area = 0
-        else:
-            # Get exterior coordinates (ignoring possible holes)
-            vertices = list(shadow_intersection.exterior.coords)
-            area = shadow_intersection.area
-        
-        return vertices, area
+        vertices, area = clip_shadow(self.D, self.H, self.L, phi_deg, theta_deg)
+        return [tuple(v) for v in vertices], area
     
     def calculate_combined_non_shadow(self, phi_i, theta_i, phi_o, theta_o):
         """Calculate combined non-shadow area and shadow geometry for two light sources"""
-        v_i, _ = self.calculate_shadow(phi_i, theta_i)
-        v_o, _ = self.calculate_shadow(phi_o, theta_o)
+        # Clip each shadow once and reuse its vertices and area for the union
+        v_i, area_i = clip_shadow(self.D, self.H, self.L, phi_i, theta_i)
+        v_o, area_o = clip_shadow(self.D, self.H, self.L, phi_o, theta_o)
         
-        rect = Polygon([(0, 0), (self.D, 0), (self.D, self.H), (0, self.H)])
-        combined = unary_union([Polygon(v_i), Polygon(v_o)])
-        
-        non_shadow = rect.difference(combined)
-        non_shadow_area = non_shadow.area if hasattr(non_shadow, 'area') else self.D * self.H
-        return non_shadow_area, combined
+        area = self.D * self.H - (area_i + area_o - poly_intersection_area(v_i, v_o))
+        return area, [[tuple(v) for v in v_i], [tuple(v) for v in v_o]]
     
     def calculate_special_case(self, phi_i, theta_i, phi_o, theta_o):
         """Handle special case where φ_i is in Q1/Q4 and φ_o is in Q4"""
@@ -130,13 +232,13 @@ class ShadowCalculator:
         phi_i_adj = 0 if quad_i == 1 else (phi_i - 270)
         phi_o_adj = phi_o - 270
         
-        # Calculate non-shadow area using the polygon method
-        non_shadow_area, _ = self.calculate_combined_non_shadow(
-            phi_i_adj, theta_i, 
-            phi_o_adj, theta_o
+        # Calculate non-shadow area using the compiled polygon method; angles are quantized
+        # to 1e-6 degrees so repeated geometries hit the cache
+        return _special_case_cached(
+            self.L, self.D, self.H,
+            round(float(phi_i_adj), 6), round(float(theta_i), 6),
+            round(float(phi_o_adj), 6), round(float(theta_o), 6)
         )
-        
-        return non_shadow_area
 
     def calculate_effective_area(self, xi, yi, zi, xo, yo, zo):
         """Calculate effective area based on Cartesian coordinates"""
@@ -193,6 +295,26 @@ class ShadowCalculator:
                 A_eff_chassis = self.A_chassis
                 
         return A_eff_SA, A_eff_chassis
+    
+    def calculate_effective_area_batch(self, phi_i, theta_i, phi_o, theta_o, quad_i, quad_o):
+        """
+        Array version of calculate_effective_area, taking the angles and quadrants from
+        calculate_geometry_batch. Quadrant cases are filled with boolean masks; only the
+        special cases (φ_i in Q1/Q4, φ_o in Q4) go through the polygon calculation.
+        """
+        A_eff_SA = np.zeros(len(phi_i))
+        A_eff_chassis = np.zeros(len(phi_i))
+        
+        # Case2-3 and Case3-3: solar array fully lit
+        A_eff_SA[((quad_i == 2) | (quad_i == 3)) & (quad_o == 3)] = self.A_SA
+        # Case3-3, Case3-4, Case4-3 and Case4-4: chassis fully lit
+        A_eff_chassis[((quad_i == 3) | (quad_i == 4)) & ((quad_o == 3) | (quad_o == 4))] = self.A_chassis
+        
+        # Case1-4 and Case4-4: special case, solved row by row
+        for k in np.flatnonzero(((quad_i == 1) | (quad_i == 4)) & (quad_o == 4)):
+            A_eff_SA[k] = self.calculate_special_case(phi_i[k], theta_i[k], phi_o[k], theta_o[k])
+        
+        return A_eff_SA, A_eff_chassis
 
 
 def calculate_solar_phase_angle(xi, yi, zi, xo, yo, zo):
@@ -215,38 +337,138 @@ def calculate_solar_phase_angle(xi, yi, zi, xo, yo, zo):
     return math.degrees(phase_angle_rad)
 
 
-def process_vectors(input_path, output_path):
-    df = pd.read_csv(input_path)
-    print("Columns found:", df.columns.tolist())
+@njit(cache=True)
+def _spherical(x, y, z):
+    """Compiled ShadowCalculator.cartesian_to_spherical for one vector"""
+    norm = math.sqrt(x**2 + y**2 + z**2)
+    if norm == 0:
+        return 0.0, 0.0
+    x, y, z = x/norm, y/norm, z/norm
+    
+    phi_rad = math.asin(max(-1.0, min(1.0, z)))
+    phi_deg = math.degrees(phi_rad)
+    if x > 0:
+        phi_deg = phi_deg % 360
+    else:
+        phi_deg = 180 - phi_deg
+    
+    # At poles theta is undefined (same tolerance as math.isclose(abs(phi_deg), 90, abs_tol=1e-9))
+    if abs(abs(phi_deg) - 90) <= max(1e-9 * max(abs(phi_deg), 90.0), 1e-9):
+        theta_deg = 0.0
+    else:
+        sin_theta = max(-1.0, min(1.0, y / math.cos(phi_rad)))
+        theta_deg = math.degrees(math.asin(sin_theta))
+    
+    return phi_deg % 360, theta_deg
+
+
+@njit(parallel=True, cache=True)
+def _geom_kernel(xi, yi, zi, xo, yo, zo, out_phase, out_quad_i, out_quad_o,
+                 out_phi_i, out_phi_o, out_theta_i, out_theta_o):
+    """Fused spherical angles, quadrants and solar phase angle for every vector pair"""
+    for k in prange(xi.shape[0]):
+        phi_i, theta_i = _spherical(xi[k], yi[k], zi[k])
+        phi_o, theta_o = _spherical(xo[k], yo[k], zo[k])
+        out_phi_i[k], out_theta_i[k] = phi_i, theta_i
+        out_phi_o[k], out_theta_o[k] = phi_o, theta_o
+        
+        # Floor division keeps negative angles in the right quadrant; & 3 wraps it to 0-3
+        out_quad_i[k] = 1 + (int(phi_i // 90) & 3)
+        out_quad_o[k] = 1 + (int(phi_o // 90) & 3)
+        
+        # Solar phase angle, clipping the cosine before acos
+        norm = math.sqrt(xi[k]**2 + yi[k]**2 + zi[k]**2) * math.sqrt(xo[k]**2 + yo[k]**2 + zo[k]**2)
+        if norm == 0:
+            out_phase[k] = 0.0
+        else:
+            dot_product = (xi[k] * xo[k] + yi[k] * yo[k] + zi[k] * zo[k]) / norm
+            out_phase[k] = math.degrees(math.acos(max(-1.0, min(1.0, dot_product))))
+
+
+def calculate_geometry_batch(xi, yi, zi, xo, yo, zo):
+    """
+    Solar phase angles, spherical angles and quadrants for arrays of vector pairs, in one compiled pass.
+    Returns (phase_angle, phi_i, theta_i, phi_o, theta_o, quad_i, quad_o).
+    """
+    n = len(xi)
+    phase_angle, phi_i, theta_i, phi_o, theta_o = (np.empty(n) for _ in range(5))
+    quad_i, quad_o = np.empty(n, dtype=np.int64), np.empty(n, dtype=np.int64)
+    _geom_kernel(xi, yi, zi, xo, yo, zo, phase_angle, quad_i, quad_o, phi_i, phi_o, theta_i, theta_o)
+    return phase_angle, phi_i, theta_i, phi_o, theta_o, quad_i, quad_o
+
+
+VECTOR_COLUMNS = ['i_x', 'i_y', 'i_z', 'o_x', 'o_y', 'o_z']
+RESULT_COLUMNS = VECTOR_COLUMNS + ['phase_angle', 'A_eff_SA', 'A_eff_chassis']
+PARQUET_BATCH_ROWS = 50_000
+
+def _process_block(calculator, df):
+    """Phase angle and effective areas for one block of vector pairs"""
+    vectors = df[VECTOR_COLUMNS].to_numpy(dtype=float)
     
-    results = []
+    # Drop rows with non-finite vector components: the clamped asin/acos in the geometry kernel
+    # would otherwise map them onto a regular quadrant and give them made-up areas
+    xi, yi, zi, xo, yo, zo = np.ascontiguousarray(vectors[np.isfinite(vectors).all(axis=1)].T)
+    
+    phase_angle, *angles_and_quadrants = calculate_geometry_batch(xi, yi, zi, xo, yo, zo)
+    A_eff_SA, A_eff_chassis = calculator.calculate_effective_area_batch(*angles_and_quadrants)
+    
+    return pd.DataFrame({
+        'i_x': xi, 'i_y': yi, 'i_z': zi,
+        'o_x': xo, 'o_y': yo, 'o_z': zo,
+        'phase_angle': phase_angle,
+        'A_eff_SA': A_eff_SA,
+        'A_eff_chassis': A_eff_chassis
+    })
+
+
+def process_vectors(input_path, output_path, block_size=4 << 20):
+    """
+    Read the vector pairs from CSV, or from the Parquet file written by Vector_Pairs.py if
+    input_path ends in .parquet. Write CSV by default, or Parquet if output_path ends in .parquet.
+    block_size is the CSV block in bytes; Parquet input is read in batches of PARQUET_BATCH_ROWS rows.
+    """
     calculator = ShadowCalculator()
+    to_parquet = output_path.endswith('.parquet')
     
-    for _, row in df.iterrows():
-        try:
-            xi, yi, zi = row['i_x'], row['i_y'], row['i_z']
-            xo, yo, zo = row['o_x'], row['o_y'], row['o_z']
-            
-            phase_angle = calculate_solar_phase_angle(xi, yi, zi, xo, yo, zo)
-            A_eff_SA, A_eff_chassis = calculator.calculate_effective_area(xi, yi, zi, xo, yo, zo)
+    # Stream the input in blocks so memory stays bounded
+    if input_path.endswith('.parquet'):
+        parquet_file = pq.ParquetFile(input_path)
+        print("Columns found:", parquet_file.schema_arrow.names)
+        reader = parquet_file.iter_batches(batch_size=PARQUET_BATCH_ROWS, columns=VECTOR_COLUMNS)
+    else:
+        # CSV vector columns are pinned to float64 because Arrow fixes column types from the first block
+        reader = pa_csv.open_csv(
+            input_path, read_options=pa_csv.ReadOptions(block_size=block_size),
+            convert_options=pa_csv.ConvertOptions(column_types=dict.fromkeys(VECTOR_COLUMNS, pa.float64())))
+        print("Columns found:", reader.schema.names)
+    
+    # The output (header or Parquet schema) is created before the first block, so an empty
+    # input still replaces an old result file
+    parquet_writer = None
+    if to_parquet:
+        parquet_writer = pq.ParquetWriter(output_path, pa.schema([(c, pa.float64()) for c in RESULT_COLUMNS]))
+    else:
+        pd.DataFrame(columns=RESULT_COLUMNS).to_csv(output_path, index=False)
+    
+    try:
+        for batch in reader:
+            results = _process_block(calculator, batch.to_pandas())
             
-            results.append({
-                'i_x': xi, 'i_y': yi, 'i_z': zi,
-                'o_x': xo, 'o_y': yo, 'o_z': zo,
-                'phase_angle': phase_angle,
-                'A_eff_SA': A_eff_SA,
-                'A_eff_chassis': A_eff_chassis
-            })
-        except Exception as e:
-            print(f"Error processing row: {str(e)}")
-            continue
-    
-    pd.DataFrame(results).to_csv(output_path, index=False)
+            if to_parquet:
+                # Opt-in binary output, one row group per block
+                parquet_writer.write_table(
+                    pa.Table.from_pandas(results, schema=parquet_writer.schema, preserve_index=False))
+            else:
+                # CSV stays byte-compatible with the results files the notebooks read back
+                results.to_csv(output_path, mode='a', header=False, index=False)
+    finally:
+        if parquet_writer is not None:
+            parquet_writer.close()
     print(f"Results saved to {output_path}")
 
 
 # Example usage
 if __name__ == "__main__":
-    input_path = r'C:\Users\27549\Desktop\course_file\presonal_project\Satellite_Optical_Brightness_MSc_Project\codeinpython\viewing_sphere_pairs.csv'
+    input_path = r'C:\Users\27549\Desktop\course_file\presonal_project\Satellite_Optical_Brightness_MSc_Project\codeinpython\viewing_sphere_pairs.parquet'  # Written by NewCode/Vector_Pairs.py
     output_path = r'C:\Users\27549\Desktop\course_file\presonal_project\Satellite_Optical_Brightness_MSc_Project\codeinpython\results.csv'
     process_vectors(input_path, output_path)
\ No newline at end of file
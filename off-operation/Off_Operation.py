@@ -1,13 +1,18 @@
 # Imports
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Repository root, for sun_term.py
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+from pyarrow import csv as pa_csv
 
 import lumos.calculator
 import lumos.conversions
+from sun_term import sun_geometry, surface_flux_per_area
 
 # Your existing satellite model (includes BRDF definitions)
 import satellite_models.starlink_v1p5 as starlink_v1p5
-from lumos.geometry import Surface  # Need to construct a per-row list of Surface objects
 
 # ---------------- Fixed geometry parameters ----------------
 satellite_heights = 1000 * 550  # m
@@ -23,19 +28,13 @@ sun_az  = np.deg2rad(-180)  # Sun azimuth -180°
 chassis_area = 3.65      # m^2
 solar_array_area = 22.68 # m^2
 
-# ---------------- Read CSV ----------------
-csv_path = r"C:\Users\27549\Desktop\course_file\presonal_project\Satellite_Optical_Brightness_MSc_Project\codeinpython\off-operation\rotated_vectors_record_area.csv"
-df = pd.read_csv(csv_path)
-
 # Expected columns: vector1_x, vector1_y, vector1_z, vector2_x, vector2_y, vector2_z, Chassis, SA
 required_cols = [
     "vector1_x", "vector1_y", "vector1_z",
     "vector2_x", "vector2_y", "vector2_z",
     "Chassis", "SA"
 ]
-missing = [c for c in required_cols if c not in df.columns]
-if missing:
-    raise ValueError(f"CSV missing required columns: {missing}")
+csv_block_size = 4 << 20  # Bytes of CSV parsed per streamed block (~50k rows)
 
 # ---------------- Get BRDF (predefined lab BRDFs from the module) ----------------
 # Some versions expose variables as lab_chassis_brdf / lab_solar_array_brdf.
@@ -47,52 +46,65 @@ except AttributeError:
     lab_chassis_brdf = starlink_v1p5.SURFACES_LAB_BRDFS[0].brdf
     lab_solar_array_brdf = starlink_v1p5.SURFACES_LAB_BRDFS[1].brdf
 
-# ---------------- Utility function: normalize vector, avoid zero vector ----------------
-def unit_vector(v):
+# ---------------- Utility function: normalize vectors, avoid zero vectors ----------------
+def unit_vectors(v):
     v = np.asarray(v, dtype=float)
-    n = np.linalg.norm(v)
-    if n == 0:
-        # If zero vector encountered, return a safe default to avoid numerical crash
-        return np.array([0.0, 0.0, 1.0])
-    return v / n
+    n = np.linalg.norm(v, axis=1, keepdims=True)
+    # If zero vector encountered, use a safe default to avoid numerical crash
+    return np.where(n == 0, np.array([0.0, 0.0, 1.0]), v / np.where(n == 0, 1.0, n))
 
-# ---------------- Row-wise calculation ----------------
-N = len(df)
-intensities = np.zeros(N, dtype=float)
-magnitudes = np.zeros(N, dtype=float)
+# ---------------- Fixed geometry (shared by every row) ----------------
+# Only the surface normals and areas change between rows
+fixed_geometry = sun_geometry(sat_alt, sat_az, satellite_heights, sun_alt, sun_az)
 
-for i, row in df.iterrows():
-    # 1) Row-specific surface normals (read from CSV and normalized)
-    chassis_normal_row = unit_vector([row["vector1_x"], row["vector1_y"], row["vector1_z"]])
-    solar_array_normal_row = unit_vector([row["vector2_x"], row["vector2_y"], row["vector2_z"]])
+def surface_intensity(areas, normals, brdf):
+    """Flux scattered by one surface with per-row areas (N,) and unit normals (N, 3)"""
+    return areas * surface_flux_per_area(tuple(normals.T), brdf, *fixed_geometry)
 
+# ---------------- Column-wise calculation ----------------
+def _process(block):
+    """Intensities for an (n, 8) block of the required columns, in required_cols order"""
+    # 1) Row-specific surface normals (read from CSV and normalized)
+    chassis_normals = unit_vectors(block[:, 0:3])
+    solar_array_normals = unit_vectors(block[:, 3:6])
+    
     # 2) Row-specific effective areas (scaled by weight columns)
-    chassis_area_eff = chassis_area * float(row["Chassis"])
-    solar_array_area_eff = solar_array_area * float(row["SA"])
-
-    # 3) Construct row-specific SURFACES list
-    surfaces_row = [
-        Surface(chassis_area_eff, chassis_normal_row, lab_chassis_brdf),
-        Surface(solar_array_area_eff, solar_array_normal_row, lab_solar_array_brdf),
-    ]
-
-    # 4) Call brightness calculation (exclude Earthshine)
-    intensities[i] = lumos.calculator.get_intensity_observer_frame(
-        surfaces_row,
-        satellite_heights,  # sat_h
-        sat_alt, sat_az,
-        sun_alt, sun_az,
-        include_earthshine=False
-    )
-
-# 5) Convert to AB magnitudes (using lumos.conversions)
-magnitudes = lumos.conversions.intensity_to_ab_mag(intensities)
-
-# (Optional) Write results back to df for export or analysis
-df["intensity"] = intensities
-df["ab_magnitude"] = magnitudes
-
-# (Optional) Save results
-out_csv = r"C:\Users\27549\Desktop\course_file\presonal_project\Satellite_Optical_Brightness_MSc_Project\codeinpython\off-operation\out_with_brightness.csv"
-df.to_csv(out_csv, index=False)
-print("Saved:", out_csv)
+    chassis_areas_eff = chassis_area * block[:, 6]
+    solar_array_areas_eff = solar_array_area * block[:, 7]
+    
+    # 3) + 4) Brightness of both surfaces for all rows (exclude Earthshine)
+    return surface_intensity(chassis_areas_eff, chassis_normals, lab_chassis_brdf) \
+        + surface_intensity(solar_array_areas_eff, solar_array_normals, lab_solar_array_brdf)
+
+if __name__ == "__main__":
+    csv_path = r"C:\Users\27549\Desktop\course_file\presonal_project\Satellite_Optical_Brightness_MSc_Project\codeinpython\off-operation\rotated_vectors_record_area.csv"
+    out_csv = r"C:\Users\27549\Desktop\course_file\presonal_project\Satellite_Optical_Brightness_MSc_Project\codeinpython\off-operation\out_with_brightness.csv"
+    
+    # ---------------- Stream CSV in blocks (Arrow parser, bounded memory) ----------------
+    # Arrow fixes column types from the first block, so the required columns are pinned to float64
+    reader = pa_csv.open_csv(
+        csv_path, read_options=pa_csv.ReadOptions(block_size=csv_block_size),
+        convert_options=pa_csv.ConvertOptions(column_types=dict.fromkeys(required_cols, pa.float64())))
+    
+    missing = [c for c in required_cols if c not in reader.schema.names]
+    if missing:
+        raise ValueError(f"CSV missing required columns: {missing}")
+    
+    # Create the output with its header up front, so an empty input still replaces an old result file
+    pd.DataFrame(columns=reader.schema.names + ["intensity", "ab_magnitude"]).to_csv(out_csv, index=False)
+    
+    # Blocks are evaluated in-process: the vectorized path takes well under a microsecond per row,
+    # far less than starting and feeding a process pool for the ~73-row normal.py sweep
+    for batch in reader:
+        df = batch.to_pandas()
+        intensities = _process(df[required_cols].to_numpy(dtype=float))
+        
+        # 5) Convert to AB magnitudes (using lumos.conversions)
+        magnitudes = lumos.conversions.intensity_to_ab_mag(intensities)
+        
+        # Write results back to df and append the block to the output
+        df["intensity"] = intensities
+        df["ab_magnitude"] = magnitudes
+        df.to_csv(out_csv, mode="a", header=False, index=False)
+    
+    print("Saved:", out_csv)
\ No newline at end of file
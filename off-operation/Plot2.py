@@ -8,12 +8,20 @@ plt.rcParams['axes.unicode_minus'] = False
 # Read Excel file - explicitly specify openpyxl engine
 file_path = r'C:...\NewCode\off-operation\Toplot2.xlsx'
 
+# Only the four plotted columns are parsed
+columns = ['rotation_angle_deg', 'Chassis', 'Abmag_eff', 'Abmag_origin']
+
 try:
-    df = pd.read_excel(file_path, engine='openpyxl')
+    df = pd.read_excel(file_path, engine='openpyxl', usecols=columns)
     print("File read successfully!")
     print(f"Data shape: {df.shape}")
     print("Columns:", df.columns.tolist())
     
+except ValueError as e:
+    # A plotted column missing from the sheet makes usecols raise ValueError listing it
+    print(f"Column name error: {e}" if "not found" in str(e) else f"Error reading file: {e}")
+    exit()
+    
 except Exception as e:
     print(f"Error reading file: {e}")
     # Check if file exists
@@ -22,18 +30,12 @@ except Exception as e:
         print("File does not exist, please check the path")
     exit()
 
-# Extract required columns
-try:
-    rotation_angle = df['rotation_angle_deg']
-    chassis = df['Chassis']
-    abmag_eff = df['Abmag_eff']
-    abmag_origin = df['Abmag_origin']
-    print("Data extracted successfully!")
-    
-except KeyError as e:
-    print(f"Column name error: {e}")
-    print("Available columns:", df.columns.tolist())
-    exit()
+# Extract required columns (plain arrays are cheaper for matplotlib than Series)
+rotation_angle = df['rotation_angle_deg'].to_numpy()
+chassis = df['Chassis'].to_numpy()
+abmag_eff = df['Abmag_eff'].to_numpy()
+abmag_origin = df['Abmag_origin'].to_numpy()
+print("Data extracted successfully!")
 
 # Create figure and main axis
 fig, ax1 = plt.subplots(figsize=(8, 6))
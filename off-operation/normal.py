@@ -1,30 +1,20 @@
 import numpy as np
 import pandas as pd
-import math
+from scipy.spatial.transform import Rotation
 
-def rotation_matrix(axis, theta):
+def rotations(axis, angles_deg):
     """
-    Return rotation matrix for rotation around axis by theta radians
-    Using Rodrigues' rotation formula
+    Return a Rotation around axis for each angle (degrees), built from rotation vectors
     """
-    axis = np.asarray(axis)
-    axis = axis / math.sqrt(np.dot(axis, axis))
-    a = math.cos(theta / 2.0)
-    b, c, d = -axis * math.sin(theta / 2.0)
-    aa, bb, cc, dd = a*a, b*b, c*c, d*d
-    bc, ad, ac, ab, bd, cd = b*c, a*d, a*c, a*b, b*d, c*d
-    
-    return np.array([[aa+bb-cc-dd, 2*(bc+ad), 2*(bd-ac)],
-                     [2*(bc-ad), aa+cc-bb-dd, 2*(cd+ab)],
-                     [2*(bd+ac), 2*(cd-ab), aa+dd-bb-cc]])
+    axis = np.asarray(axis, dtype=float)
+    axis = axis / np.linalg.norm(axis)
+    return Rotation.from_rotvec(np.radians(angles_deg)[..., None] * axis)
 
 def rotate_vector(vector, axis, angle_deg):
     """
     Rotate a vector around an axis by specified angle (degrees)
     """
-    angle_rad = np.radians(angle_deg)
-    rot_mat = rotation_matrix(axis, angle_rad)
-    return np.dot(rot_mat, vector)
+    return rotations(axis, angle_deg).apply(vector)
 
 def main():
     # Initial vectors
@@ -35,27 +25,20 @@ def main():
     rotation_axis = np.array([1, -1, 0])
 
     # Record rotation angles and results
-    angles = list(range(0, 361, 5))  # From 0° to 360°, every 30°
-    results = []
-
-    for angle in angles:
-        # Rotate vectors
-        rotated_v1 = rotate_vector(vector1, rotation_axis, angle)
-        rotated_v2 = rotate_vector(vector2, rotation_axis, angle)
-        
-        # Record results
-        results.append({
-            'rotation_angle_deg': angle,
-            'vector1_x': rotated_v1[0],
-            'vector1_y': rotated_v1[1],
-            'vector1_z': rotated_v1[2],
-            'vector2_x': rotated_v2[0],
-            'vector2_y': rotated_v2[1],
-            'vector2_z': rotated_v2[2]
-        })
+    angles = np.arange(0, 361, 5)  # From 0° to 360°, every 5°
+    
+    # Rotate both vectors by every angle at once: one batched (N,3,3) @ (3,2) product in float32,
+    # ample for the 6 decimals written to the CSV
+    matrices = rotations(rotation_axis, angles).as_matrix().astype(np.float32)
+    rotated = matrices @ np.column_stack([vector1, vector2]).astype(np.float32)
+    rotated_v1, rotated_v2 = rotated[..., 0], rotated[..., 1]
 
     # Create DataFrame and export to CSV
-    df = pd.DataFrame(results)
+    df = pd.DataFrame(
+        np.column_stack([angles, rotated_v1, rotated_v2]),
+        columns=['rotation_angle_deg', 'vector1_x', 'vector1_y', 'vector1_z',
+                 'vector2_x', 'vector2_y', 'vector2_z'])
+    df['rotation_angle_deg'] = angles  # Keep angles as integers in the CSV
     df.to_csv('rotated_vectors_record.csv', index=False, float_format='%.6f')
 
     print("Data exported to 'rotated_vectors_record_new.csv'")
@@ -64,8 +47,7 @@ def main():
 
     # Additional: Print some sample results for verification
     print("\nSample results:")
-    for i in range(0, len(results), 4):  # Print every 4th result (since there are fewer angles now)
-        result = results[i]
+    for result in df.iloc[::4].to_dict('records'):  # Print every 4th result (since there are fewer angles now)
         print(f"Angle {result['rotation_angle_deg']}°: "
               f"Vector1 = [{result['vector1_x']:.3f}, {result['vector1_y']:.3f}, {result['vector1_z']:.3f}], "
               f"Vector2 = [{result['vector2_x']:.3f}, {result['vector2_y']:.3f}, {result['vector2_z']:.3f}]")
@@ -0,0 +1,56 @@
+"""
+Sun term of lumos.calculator.get_intensity_satellite_frame (no earthshine), evaluated on whole
+arrays. lumos loops over observations one at a time; the ABmag and off-operation scripts share
+these two functions to evaluate every row at once.
+"""
+import numpy as np
+import lumos.calculator
+import lumos.constants
+
+def sun_geometry(sat_altitudes, sat_azimuths, sat_height, sun_altitudes, sun_azimuth):
+    """
+    Geometry shared by every surface of the satellite.
+    
+    Args:
+        sat_altitudes, sat_azimuths: Satellite position in the observer's HCS frame (degrees)
+        sat_height: Height of satellite above geodetic nadir (meters)
+        sun_altitudes, sun_azimuth: Sun position in the observer's HCS frame (degrees)
+    
+    Returns:
+        (vector_2_sun, sat_obs, flux_scale): unit vectors from the satellite to the sun and to the
+        observer in the brightness frame, and SUN_INTENSITY / distance² (0 where the satellite is
+        in Earth's shadow or below the observer's horizon)
+    """
+    if np.any(np.asarray(sun_altitudes) > 0):
+        raise ValueError(f"Observatory is in daylight! Sun Altitude = {np.max(sun_altitudes)}")
+    
+    # Observer position and angle past terminator in the brightness frame
+    obs_x, obs_y, obs_z, angle_past_terminator = lumos.calculator.get_brightness_coords(
+        sat_altitudes, sat_azimuths, sat_height, sun_altitudes, sun_azimuth)
+    sat_z = sat_height + lumos.constants.EARTH_RADIUS
+    dist_sat_2_obs = np.sqrt(obs_x**2 + obs_y**2 + (obs_z - sat_z)**2)
+    
+    vector_2_sun = (0, np.cos(angle_past_terminator), -np.sin(angle_past_terminator))
+    sat_obs = (obs_x / dist_sat_2_obs, obs_y / dist_sat_2_obs, (obs_z - sat_z) / dist_sat_2_obs)
+    
+    # Same visibility test as lumos; the 1 degree fudge on the horizon is lumos' own
+    horizon_angle = np.arccos(lumos.constants.EARTH_RADIUS / (lumos.constants.EARTH_RADIUS + sat_height))
+    hidden = (angle_past_terminator > horizon_angle) \
+        | (np.arccos(obs_z / lumos.constants.EARTH_RADIUS) > horizon_angle + np.deg2rad(1))
+    flux_scale = np.where(hidden, 0.0, lumos.constants.SUN_INTENSITY / dist_sat_2_obs**2)
+    return vector_2_sun, sat_obs, flux_scale
+
+def surface_flux_per_area(normal, brdf, vector_2_sun, sat_obs, flux_scale):
+    """
+    Flux per m² of surface scattered from the sun to the observer (W / m^2 / m^2).
+    
+    Args:
+        normal: Unit surface normal, a fixed (3,) vector or an (nx, ny, nz) tuple of per-row arrays
+        brdf: lumos-style BRDF function f(incident, normal, outgoing), or a constant BRDF value
+        vector_2_sun, sat_obs, flux_scale: Output of sun_geometry
+    """
+    nx, ny, nz = normal
+    surface_normalization = np.clip(ny * vector_2_sun[1] + nz * vector_2_sun[2], 0, None)
+    observer_normalization = np.clip(nx * sat_obs[0] + ny * sat_obs[1] + nz * sat_obs[2], 0, None)
+    brdf_value = brdf(vector_2_sun, normal, sat_obs) if callable(brdf) else brdf
+    return flux_scale * brdf_value * surface_normalization * observer_normalization
\ No newline at end of file